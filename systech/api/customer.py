@@ -5,6 +5,9 @@
 from __future__ import unicode_literals
 import frappe
 
+from systech.services.instrumentation import instrument_hook
+
+@instrument_hook
 def auto_assign_sales_team(doc, method=None):
     """Auto-assign creator to customer's sales team"""
     # Only auto-assign if sales_team is empty
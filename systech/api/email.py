@@ -3,37 +3,97 @@
 # For license information, please see license.txt
 
 from __future__ import unicode_literals
+import hashlib
+
 import frappe
+from frappe import _
+
+PARTY_TYPES = ("Customer", "Supplier")
+PARTY_EMAIL_CACHE_TTL = 5 * 60
+
 
 @frappe.whitelist()
-def get_party_email(party_type, party_name):
+def get_party_emails(parties):
     """
-    Get primary email for customer or supplier.
-    party_type: 'Customer' or 'Supplier'
-    Returns email address or None if not found.
+    Get primary emails for many customers / suppliers at once.
+    parties: list of (party_type, party_name) pairs, or a JSON string of it.
+    Returns {party_type: {party_name: email}}; parties without an email, or that the
+    user may not read, are left out.
     """
-    if not party_name:
-        return None
-    
-    # Try to get email from party record directly
-    email_field = "email_id" if party_type == "Customer" else "email_id"
-    party_email = frappe.db.get_value(party_type, party_name, email_field)
-    if party_email:
-        return party_email
-    
-    # Try to get from primary contact
-    primary_contact = frappe.db.get_value("Dynamic Link",
-        {
-            "link_doctype": party_type,
-            "link_name": party_name,
-            "parenttype": "Contact"
-        },
-        "parent"
+    if isinstance(parties, str):
+        parties = frappe.parse_json(parties)
+
+    names_by_type = {}
+    for party_type, party_name in parties or []:
+        if party_type not in PARTY_TYPES:
+            frappe.throw(_("Party Type must be one of {0}").format(", ".join(PARTY_TYPES)))
+        if party_name:
+            names_by_type.setdefault(party_type, set()).add(party_name)
+
+    # Only parties the user can read, User Permissions included
+    names_by_type = {
+        party_type: sorted(
+            frappe.get_list(party_type, filters={"name": ["in", list(names)]}, pluck="name", limit_page_length=0)
+        )
+        for party_type, names in sorted(names_by_type.items())
+    }
+    names_by_type = {party_type: names for party_type, names in names_by_type.items() if names}
+    if not names_by_type:
+        return {}
+
+    digest = hashlib.sha1(frappe.as_json(names_by_type).encode()).hexdigest()
+    cache_key = f"systech_party_emails|{digest}"
+    emails = frappe.cache().get_value(cache_key)
+    if emails is None:
+        emails = _fetch_party_emails(names_by_type)
+        frappe.cache().set_value(cache_key, emails, expires_in_sec=PARTY_EMAIL_CACHE_TTL)
+
+    return emails
+
+
+def _fetch_party_emails(names_by_type):
+    emails = {party_type: {} for party_type in names_by_type}
+
+    # 1. Email on the party record itself, all party types in one statement
+    party_queries = []
+    params = {}
+    for party_type, names in names_by_type.items():
+        key = frappe.scrub(party_type)
+        party_queries.append(
+            f"SELECT '{party_type}' as party_type, name, email_id FROM `tab{party_type}` WHERE name IN %({key})s"
+        )
+        params[key] = names
+
+    for row in frappe.db.sql(" UNION ALL ".join(party_queries), params, as_dict=True):
+        if row.email_id:
+            emails[row.party_type][row.name] = row.email_id
+
+    # 2. Linked Contacts for whoever is still missing, primary contact first
+    missing = {
+        party_type: {name for name in names if name not in emails[party_type]}
+        for party_type, names in names_by_type.items()
+    }
+    missing_names = sorted({name for names in missing.values() for name in names})
+    if not missing_names:
+        return emails
+
+    contacts = frappe.db.sql(
+        """
+        SELECT dl.link_doctype, dl.link_name, contact.email_id
+        FROM `tabDynamic Link` dl
+        JOIN `tabContact` contact ON contact.name = dl.parent
+        WHERE dl.parenttype = 'Contact'
+            AND dl.link_doctype IN %(party_types)s
+            AND dl.link_name IN %(names)s
+            AND IFNULL(contact.email_id, '') != ''
+        ORDER BY contact.is_primary_contact DESC, contact.creation
+    """,
+        {"party_types": list(missing), "names": missing_names},
+        as_dict=True,
     )
-    
-    if primary_contact:
-        contact_email = frappe.db.get_value("Contact", primary_contact, "email_id")
-        if contact_email:
-            return contact_email
-    
-    return None
+
+    for row in contacts:
+        if row.link_name in missing[row.link_doctype]:
+            emails[row.link_doctype].setdefault(row.link_name, row.email_id)
+
+    return emails
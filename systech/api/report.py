@@ -7,17 +7,16 @@ def get_brands_for_supplier(doctype, txt, searchfield, start, page_len, filters)
     if not supplier:
         return []
     
-    # Brands (Item Groups) that this supplier has supplied in Purchase Invoices
+    # Brands (Item Groups) that this supplier has supplied in Purchase Invoices,
+    # most frequently purchased first (maintained on Purchase Invoice submit/cancel)
     brands = frappe.db.sql("""
-        SELECT DISTINCT item.item_group
-        FROM `tabPurchase Invoice Item` pi_item
-        JOIN `tabPurchase Invoice` pi ON pi_item.parent = pi.name
-        JOIN `tabItem` item ON pi_item.item_code = item.name
-        WHERE pi.supplier = %s
-        AND pi.docstatus = 1
-        AND item.item_group LIKE %s
+        SELECT item_group
+        FROM `tabSupplier Brand Index`
+        WHERE supplier = %s
+        AND item_group LIKE %s
+        ORDER BY purchase_count DESC, last_purchase_date DESC
         LIMIT %s, %s
-    """, (supplier, f"%{txt}%", start, page_len))
+    """, (supplier, f"{txt}%", start, page_len))
     
     return brands
 
@@ -30,14 +29,12 @@ def get_suppliers_for_brand(doctype, txt, searchfield, start, page_len, filters)
     
     # Suppliers who have supplied items in this Item Group (Brand)
     suppliers = frappe.db.sql("""
-        SELECT DISTINCT pi.supplier
-        FROM `tabPurchase Invoice Item` pi_item
-        JOIN `tabPurchase Invoice` pi ON pi_item.parent = pi.name
-        JOIN `tabItem` item ON pi_item.item_code = item.name
-        WHERE item.item_group = %s
-        AND pi.docstatus = 1
-        AND pi.supplier LIKE %s
+        SELECT supplier
+        FROM `tabSupplier Brand Index`
+        WHERE item_group = %s
+        AND supplier LIKE %s
+        ORDER BY purchase_count DESC, last_purchase_date DESC
         LIMIT %s, %s
-    """, (brand, f"%{txt}%", start, page_len))
+    """, (brand, f"{txt}%", start, page_len))
     
     return suppliers
@@ -9,25 +9,60 @@ frappe.ui.form.on('Bulk Sales Person Target', {
                 return;
             }
 
-            frappe.call({
-                method: 'systech.doctype.bulk_sales_person_target.bulk_sales_person_target.preview_changes',
-                args: {
-                    fiscal_year: frm.doc.fiscal_year,
-                    item_group: frm.doc.item_group,
-                    target_type: frm.doc.target_type,
-                    amount: frm.doc.amount
-                },
-                callback: function (r) {
-                    if (r.message) {
-                        show_preview_dialog(frm, r.message);
-                    }
-                }
+            fetch_preview_page(frm, 0, function (preview) {
+                show_preview_dialog(frm, preview);
             });
         }).addClass('btn-primary');
     }
 });
 
-function show_preview_dialog(frm, preview_data) {
+function fetch_preview_page(frm, start, callback) {
+    frappe.call({
+        method: 'systech.doctype.bulk_sales_person_target.bulk_sales_person_target.preview_changes',
+        args: {
+            fiscal_year: frm.doc.fiscal_year,
+            item_group: frm.doc.item_group,
+            target_type: frm.doc.target_type,
+            amount: frm.doc.amount,
+            start: start
+        },
+        callback: function (r) {
+            if (r.message) {
+                callback(r.message);
+            }
+        }
+    });
+}
+
+function get_preview_rows_html(rows, selection) {
+    return rows.map(function (item) {
+        let row_class = item.status === 'Override' ? 'warning' : '';
+        let checked = is_selected(selection, item.sales_person) ? 'checked' : '';
+        return `
+            <tr class="${row_class}">
+                <td><input type="checkbox" ${checked} data-sales-person="${item.sales_person}"></td>
+                <td>${item.sales_person_name}</td>
+                <td class="text-right">${format_currency(item.current_target)}</td>
+                <td class="text-right">${format_currency(item.new_target)}</td>
+                <td><span class="indicator ${item.status === 'Override' ? 'orange' : 'blue'}">${item.status}</span></td>
+            </tr>
+        `;
+    }).join('');
+}
+
+// The selection covers every Sales Person, not only the loaded pages:
+// with all_selected it means "everyone except `except`", otherwise "only `except`".
+function is_selected(selection, sales_person) {
+    return selection.all_selected !== selection.except.has(sales_person);
+}
+
+function get_selected_count(selection, total_count) {
+    return selection.all_selected ? total_count - selection.except.size : selection.except.size;
+}
+
+function show_preview_dialog(frm, preview) {
+    let selection = { all_selected: true, except: new Set() };
+
     let dialog = new frappe.ui.Dialog({
         title: __('Preview Target Changes'),
         size: 'large',
@@ -39,21 +74,14 @@ function show_preview_dialog(frm, preview_data) {
         ],
         primary_action_label: __('Apply Targets'),
         primary_action: function () {
-            let selected_people = [];
-            dialog.$wrapper.find('input[type="checkbox"]:checked').each(function () {
-                let sp_name = $(this).data('sales-person');
-                if (sp_name) {
-                    selected_people.push(sp_name);
-                }
-            });
-
-            if (selected_people.length === 0) {
+            let selected_count = get_selected_count(selection, preview.total_count);
+            if (selected_count === 0) {
                 frappe.msgprint(__('Please select at least one Sales Person.'));
                 return;
             }
 
             frappe.confirm(
-                __('Apply targets to {0} Sales People?', [selected_people.length]),
+                __('Apply targets to {0} Sales People?', [selected_count]),
                 function () {
                     frappe.call({
                         method: 'systech.doctype.bulk_sales_person_target.bulk_sales_person_target.apply_targets',
@@ -62,12 +90,17 @@ function show_preview_dialog(frm, preview_data) {
                             item_group: frm.doc.item_group,
                             target_type: frm.doc.target_type,
                             amount: frm.doc.amount,
-                            selected_people: selected_people
+                            select_all: selection.all_selected ? 1 : 0,
+                            selected_people: selection.all_selected ? [] : Array.from(selection.except),
+                            excluded_people: selection.all_selected ? Array.from(selection.except) : []
                         },
                         callback: function (r) {
                             if (r.message && r.message.status === 'success') {
                                 frappe.msgprint(__('Successfully updated {0} Sales People.', [r.message.updated_count]));
                                 dialog.hide();
+                            } else if (r.message && r.message.status === 'queued') {
+                                frappe.msgprint(__('Targets for {0} Sales People are being applied in the background.', [r.message.updated_count]));
+                                dialog.hide();
                             }
                         }
                     });
@@ -76,12 +109,20 @@ function show_preview_dialog(frm, preview_data) {
         }
     });
 
+    let loaded = preview.rows.length;
+    let distribution = preview.distribution.map(d => `
+        <td class="text-right">${__(d.month).substr(0, 3)}<br>${format_currency(d.new_target)}</td>
+    `).join('');
+
     // Build preview table HTML
     let html = `
         <div class="mb-3">
             <button class="btn btn-xs btn-default" id="select-all-btn">${__('Select All')}</button>
             <button class="btn btn-xs btn-default ml-2" id="deselect-all-btn">${__('Deselect All')}</button>
+            <span class="text-muted small ml-2" id="preview-count"></span>
         </div>
+        <div class="text-muted small mb-2">${__('Monthly split of the new target')}</div>
+        <table class="table table-bordered table-condensed small"><tr>${distribution}</tr></table>
         <table class="table table-bordered table-condensed">
             <thead>
                 <tr>
@@ -92,38 +133,58 @@ function show_preview_dialog(frm, preview_data) {
                     <th>${__('Status')}</th>
                 </tr>
             </thead>
-            <tbody>
+            <tbody id="preview-rows">${get_preview_rows_html(preview.rows, selection)}</tbody>
+        </table>
+        <button class="btn btn-xs btn-default" id="load-more-btn">${__('Load More')}</button>
     `;
 
-    preview_data.forEach(function (item) {
-        let row_class = item.status === 'Override' ? 'warning' : '';
-        html += `
-            <tr class="${row_class}">
-                <td><input type="checkbox" checked data-sales-person="${item.sales_person}"></td>
-                <td>${item.sales_person_name}</td>
-                <td class="text-right">${format_currency(item.current_target)}</td>
-                <td class="text-right">${format_currency(item.new_target)}</td>
-                <td><span class="indicator ${item.status === 'Override' ? 'orange' : 'blue'}">${item.status}</span></td>
-            </tr>
-        `;
+    dialog.fields_dict.preview_table.$wrapper.html(html);
+
+    let update_count = function () {
+        dialog.$wrapper.find('#preview-count').text(__('Showing {0} of {1}, {2} selected', [
+            loaded, preview.total_count, get_selected_count(selection, preview.total_count)
+        ]));
+        dialog.$wrapper.find('#load-more-btn').toggle(loaded < preview.total_count);
+    };
+    update_count();
+
+    dialog.$wrapper.find('#load-more-btn').on('click', function () {
+        fetch_preview_page(frm, loaded, function (page) {
+            dialog.$wrapper.find('#preview-rows').append(get_preview_rows_html(page.rows, selection));
+            loaded += page.rows.length;
+            update_count();
+        });
     });
 
-    html += '</tbody></table>';
+    let select_all = function (checked) {
+        selection.all_selected = checked;
+        selection.except.clear();
+        dialog.$wrapper.find('input[type="checkbox"]').prop('checked', checked);
+        update_count();
+    };
 
-    dialog.fields_dict.preview_table.$wrapper.html(html);
+    // Track single rows, including those on pages not loaded yet
+    dialog.$wrapper.on('change', 'tbody input[type="checkbox"]', function () {
+        let sales_person = $(this).data('sales-person');
+        if ($(this).is(':checked') === selection.all_selected) {
+            selection.except.delete(sales_person);
+        } else {
+            selection.except.add(sales_person);
+        }
+        update_count();
+    });
 
-    // Bind select all checkbox
+    // Select/deselect all applies to every Sales Person, loaded or not
     dialog.$wrapper.find('#select-all-checkbox').on('change', function () {
-        dialog.$wrapper.find('tbody input[type="checkbox"]').prop('checked', $(this).is(':checked'));
+        select_all($(this).is(':checked'));
     });
 
-    // Bind select/deselect all buttons
     dialog.$wrapper.find('#select-all-btn').on('click', function () {
-        dialog.$wrapper.find('input[type="checkbox"]').prop('checked', true);
+        select_all(true);
     });
 
     dialog.$wrapper.find('#deselect-all-btn').on('click', function () {
-        dialog.$wrapper.find('tbody input[type="checkbox"]').prop('checked', false);
+        select_all(false);
     });
 
     dialog.show();
@@ -4,110 +4,99 @@
 
 from __future__ import unicode_literals
 import frappe
+from frappe import _
 from frappe.model.document import Document
-from frappe.utils import flt
+from frappe.utils import cint, flt
+
+from systech.services.sales_person_target import apply_bulk_targets, get_distribution_percentages
+
+PREVIEW_PAGE_LENGTH = 500
 
 class BulkSalesPersonTarget(Document):
     pass
 
 @frappe.whitelist()
-def preview_changes(fiscal_year, item_group, target_type, amount):
+def preview_changes(fiscal_year, item_group, target_type, amount, start=0, page_length=PREVIEW_PAGE_LENGTH):
     """
     Preview which Sales People will be affected by the bulk target update.
-    Returns a list of Sales People with current vs new targets.
+    Returns one page of Sales People with current vs new targets, the total count and
+    how the new yearly target is spread over the months.
     """
-    # Get all enabled Sales People (excluding groups)
-    sales_people = frappe.get_all("Sales Person",
-        filters={"enabled": 1, "is_group": 0},
-        fields=["name", "sales_person_name"]
-    )
-    
     # Calculate yearly target
     yearly_target = flt(amount) * 12 if target_type == "Monthly" else flt(amount)
-    
+
+    # All enabled Sales People (excluding groups) with their current target, one query
+    sales_people = frappe.db.sql("""
+        SELECT
+            sp.name as sales_person,
+            sp.sales_person_name,
+            MAX(td.target_amount) as current_target,
+            MAX(td.distribution_id) as current_distribution,
+            COUNT(*) OVER () as total_count
+        FROM `tabSales Person` sp
+        LEFT JOIN `tabTarget Detail` td
+            ON td.parent = sp.name
+            AND td.parenttype = 'Sales Person'
+            AND td.fiscal_year = %(fiscal_year)s
+            AND td.item_group = %(item_group)s
+        WHERE sp.enabled = 1 AND sp.is_group = 0
+        GROUP BY sp.name
+        ORDER BY sp.name
+        LIMIT %(start)s, %(page_length)s
+    """, {
+        "fiscal_year": fiscal_year,
+        "item_group": item_group,
+        "start": cint(start),
+        "page_length": cint(page_length),
+    }, as_dict=True)
+
     preview_data = []
     for sp in sales_people:
-        # Check if this person already has a target for this year/item group
-        current_target = frappe.db.get_value("Target Detail",
-            {"parent": sp.name, "fiscal_year": fiscal_year, "item_group": item_group},
-            "target_amount"
-        )
-        
+        current_target = flt(sp.current_target)
         preview_data.append({
-            "sales_person": sp.name,
+            "sales_person": sp.sales_person,
             "sales_person_name": sp.sales_person_name,
-            "current_target": flt(current_target) if current_target else 0,
+            "current_target": current_target,
+            "current_distribution": sp.current_distribution,
             "new_target": yearly_target,
+            "change": yearly_target - current_target,
             "status": "Override" if current_target else "New"
         })
-    
-    return preview_data
+
+    distribution = [
+        {"month": month, "percentage": percentage, "new_target": yearly_target * flt(percentage) / 100}
+        for month, percentage in get_distribution_percentages(fiscal_year)
+    ]
+
+    return {
+        "rows": preview_data,
+        "total_count": sales_people[0].total_count if sales_people else 0,
+        "start": cint(start),
+        "distribution": distribution,
+    }
 
 @frappe.whitelist()
-def apply_targets(fiscal_year, item_group, target_type, amount, selected_people):
+def apply_targets(fiscal_year, item_group, target_type, amount, selected_people=None, select_all=0, excluded_people=None):
     """
     Apply targets to the selected Sales People.
-    selected_people should be a JSON array of sales person names.
+    selected_people should be a JSON array of sales person names; with select_all set, every
+    Sales Person the preview lists is targeted instead, except those in excluded_people.
+    Large selections are applied in the background with progress updates.
     """
-    import json
-    selected = json.loads(selected_people) if isinstance(selected_people, str) else selected_people
-    
-    # Calculate yearly target
-    yearly_target = flt(amount) * 12 if target_type == "Monthly" else flt(amount)
-    
-    # Ensure Monthly Equal distribution exists
-    distribution_id = ensure_monthly_equal_distribution(fiscal_year)
-    
-    updated_count = 0
-    for sp_name in selected:
-        sp_doc = frappe.get_doc("Sales Person", sp_name)
-        
-        # Check if target row exists
-        existing_target = None
-        for target in sp_doc.targets:
-            if target.fiscal_year == fiscal_year and target.item_group == item_group:
-                existing_target = target
-                break
-        
-        if existing_target:
-            # Update existing
-            existing_target.target_amount = yearly_target
-            existing_target.distribution_id = distribution_id
-        else:
-            # Add new row
-            sp_doc.append("targets", {
-                "fiscal_year": fiscal_year,
-                "item_group": item_group,
-                "target_amount": yearly_target,
-                "distribution_id": distribution_id
-            })
-        
-        sp_doc.save(ignore_permissions=True)
-        updated_count += 1
-    
-    frappe.db.commit()
-    return {"status": "success", "updated_count": updated_count}
+    if cint(select_all):
+        if isinstance(excluded_people, str):
+            excluded_people = frappe.parse_json(excluded_people)
+        excluded = set(excluded_people or [])
+        selected = [
+            name for name in frappe.get_all(
+                "Sales Person", filters={"enabled": 1, "is_group": 0}, order_by="name", pluck="name"
+            )
+            if name not in excluded
+        ]
+    else:
+        selected = frappe.parse_json(selected_people) if isinstance(selected_people, str) else selected_people or []
 
-def ensure_monthly_equal_distribution(fiscal_year):
-    """
-    Ensure a 'Monthly Equal' distribution exists for the given fiscal year.
-    Returns the distribution ID.
-    """
-    dist_name = f"Monthly Equal - {fiscal_year}"
-    
-    if not frappe.db.exists("Monthly Distribution", dist_name):
-        dist = frappe.new_doc("Monthly Distribution")
-        dist.distribution_id = dist_name
-        dist.fiscal_year = fiscal_year
-        
-        # Add 12 equal percentages (8.33% each, totaling ~100%)
-        for month in range(1, 13):
-            dist.append("percentages", {
-                "month": frappe.utils.get_month_name(month),
-                "percentage_allocation": 8.33
-            })
-        
-        dist.insert(ignore_permissions=True)
-        frappe.db.commit()
-    
-    return dist_name
+    if not selected:
+        frappe.throw(_("Please select at least one Sales Person."))
+
+    return apply_bulk_targets(fiscal_year, item_group, target_type, amount, selected)
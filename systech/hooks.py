@@ -146,15 +146,71 @@ doc_events = {
 	# 	"validate": "systech.services.rest.validate_transaction_barcodes"
 	# },
 	"Stock Entry": {
-		"validate": "systech.services.rest.validate_transaction_barcodes"
+		"validate": "systech.services.rest.validate_transaction_barcodes",
+		"on_submit": "systech.services.report_cache.invalidate_report_cache",
+		"on_cancel": "systech.services.report_cache.invalidate_report_cache"
 	},
+    "Purchase Receipt": {
+        "on_submit": "systech.services.report_cache.invalidate_report_cache",
+        "on_cancel": "systech.services.report_cache.invalidate_report_cache"
+    },
+    "Stock Reconciliation": {
+        "on_submit": "systech.services.report_cache.invalidate_report_cache",
+        "on_cancel": "systech.services.report_cache.invalidate_report_cache"
+    },
+    "Item": {
+        # Item fields (item group, name) are joined into the cached warehouse and supplier reports
+        "on_update": [
+            "systech.services.barcode.update_barcode_index",
+            "systech.services.report_cache.invalidate_report_cache"
+        ],
+        "on_trash": [
+            "systech.services.barcode.update_barcode_index",
+            "systech.services.report_cache.invalidate_report_cache"
+        ],
+        "after_rename": [
+            "systech.services.barcode.update_barcode_index",
+            "systech.services.report_cache.invalidate_report_cache"
+        ]
+    },
     "Sales Order": {
         "before_insert": "systech.services.api.auto_assign_sales_person",
         "before_workflow_action": "systech.services.workflow.before_workflow_action",
         "on_update": "systech.services.workflow.check_dependencies_on_release"
     },
     "Sales Invoice": {
-        "before_insert": "systech.services.api.auto_assign_sales_person"
+        "before_insert": "systech.services.api.auto_assign_sales_person",
+        "on_submit": [
+            "systech.services.project_profitability.update_project_profitability",
+            "systech.services.report_cache.invalidate_report_cache"
+        ],
+        "on_cancel": [
+            "systech.services.project_profitability.update_project_profitability",
+            "systech.services.report_cache.invalidate_report_cache"
+        ]
+    },
+    "Purchase Invoice": {
+        "validate": "systech.services.project_budget.validate_purchase_budget",
+        "on_submit": [
+            "systech.services.project_budget.update_project_spend",
+            "systech.services.project_profitability.update_project_profitability",
+            "systech.services.supplier_brand_index.update_supplier_brand_index",
+            "systech.services.report_cache.invalidate_report_cache"
+        ],
+        "on_cancel": [
+            "systech.services.project_budget.update_project_spend",
+            "systech.services.project_profitability.update_project_profitability",
+            "systech.services.supplier_brand_index.update_supplier_brand_index",
+            "systech.services.report_cache.invalidate_report_cache"
+        ]
+    },
+    "Payment Entry": {
+        "on_submit": "systech.services.report_cache.invalidate_report_cache",
+        "on_cancel": "systech.services.report_cache.invalidate_report_cache"
+    },
+    "Journal Entry": {
+        "on_submit": "systech.services.report_cache.invalidate_report_cache",
+        "on_cancel": "systech.services.report_cache.invalidate_report_cache"
     },
     "Quotation": {
         "before_insert": "systech.services.api.auto_assign_sales_person"
@@ -163,13 +219,25 @@ doc_events = {
         "before_insert": "systech.api.customer.auto_assign_sales_team"
     },
     "Delivery Note": {
-        "on_submit": "systech.services.workflow.enforce_dn_stock"
+        "on_submit": [
+            "systech.services.workflow.enforce_dn_stock",
+            "systech.services.report_cache.invalidate_report_cache"
+        ],
+        "on_cancel": "systech.services.report_cache.invalidate_report_cache"
     },
     "Bin": {
         "before_save": "systech.services.bin_hooks.recalculate_bin_reserved_stock"
     },
     "Project": {
-        "validate": "systech.services.project_budget.validate_project_budget"
+        "validate": "systech.services.project_budget.validate_project_budget",
+        "on_update": [
+            "systech.services.project_budget.update_budget_rollup",
+            "systech.services.report_cache.invalidate_report_cache"
+        ],
+        "on_trash": [
+            "systech.services.project_budget.update_budget_rollup",
+            "systech.services.report_cache.invalidate_report_cache"
+        ]
     }
 }
 
@@ -194,6 +262,15 @@ doc_events = {
 # 	],
 # }
 
+scheduler_events = {
+	"daily": [
+		"systech.services.report_mailer.send_due_report_emails"
+	],
+	"monthly": [
+		"systech.services.asset_valuation.take_asset_valuation_snapshot"
+	],
+}
+
 # Testing
 # -------
 
@@ -205,6 +282,10 @@ doc_events = {
 # override_whitelisted_methods = {
 # 	"frappe.desk.doctype.event.event.get_events": "systech.event.get_events"
 # }
+
+override_whitelisted_methods = {
+	"frappe.desk.query_report.run": "systech.services.field_masking.get_report_data",
+}
 #
 # each overriding function accepts a `data` argument;
 # generated from the base implementation of the doctype dashboard,
@@ -0,0 +1,34 @@
+from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
+
+from systech.services.project_budget import rebuild_budget_rollup
+
+
+def execute():
+	# Fixtures sync after patches; the rollup columns must exist before the backfill
+	create_custom_fields(
+		{
+			"Project": [
+				{
+					"fieldname": "sub_project_budget",
+					"label": "Sub-Project Budget",
+					"fieldtype": "Currency",
+					"insert_after": "estimated_costing",
+					"read_only": 1,
+					"no_copy": 1,
+					"description": "Sum of the budgets of the direct sub-projects",
+				},
+				{
+					"fieldname": "total_sub_project_budget",
+					"label": "Total Sub-Project Budget",
+					"fieldtype": "Currency",
+					"insert_after": "sub_project_budget",
+					"read_only": 1,
+					"no_copy": 1,
+					"description": "Sum of the budgets of all sub-projects at every level below",
+				},
+			]
+		},
+		update=True,
+	)
+
+	rebuild_budget_rollup()
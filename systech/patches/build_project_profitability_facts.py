@@ -0,0 +1,5 @@
+from systech.services.project_profitability import rebuild_project_profitability
+
+
+def execute():
+	rebuild_project_profitability()
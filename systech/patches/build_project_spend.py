@@ -0,0 +1,33 @@
+from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
+
+from systech.services.project_budget import rebuild_project_spend
+
+
+def execute():
+	# Fixtures sync after patches; the spend columns must exist before the backfill
+	create_custom_fields(
+		{
+			"Project": [
+				{
+					"fieldname": "actual_spend",
+					"label": "Actual Spend",
+					"fieldtype": "Currency",
+					"insert_after": "total_sub_project_budget",
+					"read_only": 1,
+					"no_copy": 1,
+					"description": "Net amount of submitted Purchase Invoices booked against this project",
+				},
+				{
+					"fieldname": "block_over_budget_spend",
+					"label": "Block Spend Over Budget",
+					"fieldtype": "Check",
+					"insert_after": "actual_spend",
+					"default": "0",
+					"description": "Stop Purchase Invoices that would take Actual Spend past the project budget",
+				},
+			]
+		},
+		update=True,
+	)
+
+	rebuild_project_spend()
@@ -0,0 +1,5 @@
+from systech.services.supplier_brand_index import rebuild_supplier_brand_index
+
+
+def execute():
+	rebuild_supplier_brand_index()
@@ -0,0 +1,6 @@
+from systech.services.project_profitability import rebuild_project_profitability
+
+
+def execute():
+	# Facts built before lines carried their own project were attributed to the invoice's
+	rebuild_project_profitability()
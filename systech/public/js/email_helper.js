@@ -17,6 +17,17 @@ frappe.ui.form.on('Quotation', {
     }
 });
 
+// Resolve the emails of any number of [party_type, party_name] pairs in one round trip.
+// Resolves to {party_type: {party_name: email}}.
+function get_party_emails(parties) {
+    return frappe.call({
+        method: 'systech.api.email.get_party_emails',
+        args: { parties: parties }
+    }).then(function (r) {
+        return r.message || {};
+    });
+}
+
 function setup_email_auto_populate(frm) {
     // Override the standard email dialog
     frm.email_doc = function () {
@@ -25,17 +36,12 @@ function setup_email_auto_populate(frm) {
 
         if (!customer_email && frm.doc.customer) {
             // Try to fetch from customer record
-            frappe.call({
-                method: 'systech.api.email.get_customer_email',
-                args: {
-                    customer: frm.doc.customer
-                },
-                callback: function (r) {
-                    if (r.message) {
-                        open_email_dialog(frm, r.message);
-                    } else {
-                        show_missing_email_warning(frm);
-                    }
+            get_party_emails([['Customer', frm.doc.customer]]).then(function (emails) {
+                let email = (emails.Customer || {})[frm.doc.customer];
+                if (email) {
+                    open_email_dialog(frm, email);
+                } else {
+                    show_missing_email_warning(frm);
                 }
             });
         } else if (customer_email) {
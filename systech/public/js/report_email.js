@@ -91,15 +91,8 @@ function show_email_report_dialog(report_name, filters) {
     };
 
     if (party_name) {
-        frappe.call({
-            method: 'systech.api.email.get_party_email',
-            args: {
-                party_type: party_type,
-                party_name: party_name
-            },
-            callback: function (r) {
-                open_dialog(r.message || "");
-            }
+        get_party_emails([[party_type, party_name]]).then(function (emails) {
+            open_dialog((emails[party_type] || {})[party_name] || "");
         });
     } else {
         open_dialog("");
@@ -98,6 +98,12 @@ function show_target_dialog(selected_people) {
                                 });
                                 d.hide();
                                 cur_list.refresh();
+                            } else if (r.message && r.message.status === 'queued') {
+                                frappe.show_alert({
+                                    message: __('Targets for {0} Sales People are being applied in the background', [r.message.updated_count]),
+                                    indicator: 'blue'
+                                });
+                                d.hide();
                             }
                         }
                     });
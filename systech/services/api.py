@@ -2,6 +2,8 @@ import frappe
 from frappe import _
 from frappe.utils import flt
 
+from systech.services.instrumentation import instrument_hook
+
 
 @frappe.whitelist()
 def get_dashboard_data():
@@ -180,6 +182,7 @@ def get_current_salesperson():
 
 
 
+@instrument_hook
 def auto_assign_sales_person(doc, method):
     """
     Auto-assign the current logged-in user as a Sales Person to the document.
@@ -0,0 +1,155 @@
+import frappe
+from frappe.desk.reportview import build_match_conditions
+from frappe.utils import add_months, flt, get_last_day, getdate, now, nowdate
+
+SNAPSHOT_DOCTYPE = "Asset Valuation Snapshot"
+
+VALUATION_FIELDS = (
+	"asset", "asset_name", "finance_book", "company", "asset_category", "location",
+	"original_cost", "accumulated_depreciation", "booked_depreciation", "net_book_value",
+	"remaining_life_months",
+)  # fmt: skip
+
+
+@frappe.whitelist()
+def get_asset_valuation(as_on_date=None, company=None, asset_category=None, location=None):
+	"""
+	Original cost, accumulated depreciation, net book value and remaining life of every
+	submitted asset as on a date, using its default (else first) finance book.
+	Period ends with a materialized snapshot are served from it.
+	"""
+	frappe.has_permission("Asset", "read", throw=True)
+
+	as_on_date = getdate(as_on_date or nowdate())
+	filters = frappe._dict(company=company, asset_category=asset_category, location=location)
+
+	# Only assets the user may read: User Permissions and permission query conditions
+	filters.permitted_assets = get_permitted_assets_condition()
+
+	if frappe.db.exists(SNAPSHOT_DOCTYPE, {"snapshot_date": as_on_date}):
+		return get_snapshot_valuation(as_on_date, filters)
+
+	return compute_asset_valuation(as_on_date, filters)
+
+
+def compute_asset_valuation(as_on_date, filters):
+	"""
+	One grouped query over assets, finance books and active schedule rows.
+	Scheduled rows up to the date make up the accumulated depreciation; the net book
+	value starts from the finance book's current value (which carries revaluations),
+	adds back everything booked since and takes off what is scheduled but not yet booked.
+	"""
+	conditions = []
+	for field in ("company", "asset_category", "location"):
+		if filters.get(field):
+			conditions.append(f"AND asset.{field} = %({field})s")
+	if filters.get("permitted_assets"):
+		conditions.append(f"AND asset.name IN {filters.permitted_assets}")
+
+	rows = frappe.db.sql(
+		f"""
+		SELECT
+			asset.name as asset,
+			asset.asset_name,
+			afb.finance_book,
+			asset.company,
+			asset.asset_category,
+			asset.location,
+			asset.total_asset_cost as original_cost,
+			afb.value_after_depreciation,
+			afb.frequency_of_depreciation,
+			SUM(CASE WHEN ds.schedule_date <= %(as_on_date)s
+				THEN ds.depreciation_amount ELSE 0 END) as accumulated_depreciation,
+			SUM(CASE WHEN ds.schedule_date <= %(as_on_date)s AND IFNULL(ds.journal_entry, '') != ''
+				THEN ds.depreciation_amount ELSE 0 END) as booked_depreciation,
+			SUM(CASE WHEN IFNULL(ds.journal_entry, '') != ''
+				THEN ds.depreciation_amount ELSE 0 END) as total_booked_depreciation,
+			COUNT(CASE WHEN ds.schedule_date > %(as_on_date)s THEN ds.name END) as remaining_depreciations
+		FROM `tabAsset` asset
+		JOIN `tabAsset Finance Book` afb
+			ON afb.parent = asset.name AND afb.parenttype = 'Asset'
+		LEFT JOIN `tabAsset Depreciation Schedule` ads
+			ON ads.asset = asset.name AND ads.finance_book <=> afb.finance_book AND ads.status = 'Active'
+		LEFT JOIN `tabDepreciation Schedule` ds
+			ON ds.parent = ads.name AND ds.parenttype = 'Asset Depreciation Schedule'
+		WHERE asset.docstatus = 1
+			AND asset.available_for_use_date <= %(as_on_date)s
+			AND (asset.disposal_date IS NULL OR asset.disposal_date > %(as_on_date)s)
+			{" ".join(conditions)}
+		GROUP BY asset.name, afb.name
+		ORDER BY asset.name, (afb.finance_book <=> asset.default_finance_book) DESC, afb.idx
+	""",
+		dict(filters, as_on_date=as_on_date),
+		as_dict=True,
+	)
+
+	valuation = []
+	seen = set()
+	for row in rows:
+		if row.asset in seen:
+			continue
+		seen.add(row.asset)
+
+		row.net_book_value = (
+			flt(row.value_after_depreciation) + flt(row.total_booked_depreciation) - flt(row.accumulated_depreciation)
+		)
+		row.remaining_life_months = flt(row.remaining_depreciations) * flt(row.frequency_of_depreciation)
+		valuation.append({field: row.get(field) for field in VALUATION_FIELDS})
+
+	return valuation
+
+
+def get_snapshot_valuation(snapshot_date, filters):
+	conditions = []
+	for field in ("company", "asset_category", "location"):
+		if filters.get(field):
+			conditions.append(f"AND {field} = %({field})s")
+	if filters.get("permitted_assets"):
+		conditions.append(f"AND asset IN {filters.permitted_assets}")
+
+	return frappe.db.sql(
+		f"""
+		SELECT {", ".join(VALUATION_FIELDS)}
+		FROM `tab{SNAPSHOT_DOCTYPE}`
+		WHERE snapshot_date = %(snapshot_date)s
+			{" ".join(conditions)}
+		ORDER BY asset
+	""",
+		dict(filters, snapshot_date=snapshot_date),
+		as_dict=True,
+	)
+
+
+def get_permitted_assets_condition():
+	"""Sub-query of the Assets the session user may read, or None when unrestricted."""
+	match_conditions = build_match_conditions("Asset")
+	if not match_conditions:
+		return None
+
+	return f"(SELECT `tabAsset`.name FROM `tabAsset` WHERE {match_conditions})"
+
+
+def take_asset_valuation_snapshot(snapshot_date=None):
+	"""
+	Materialize the valuation of every asset at a period end (by default the last
+	day of the previous month), replacing any earlier snapshot for that date.
+	Hooked to: scheduler_events monthly
+	"""
+	snapshot_date = getdate(snapshot_date or get_last_day(add_months(nowdate(), -1)))
+	valuation = compute_asset_valuation(snapshot_date, frappe._dict())
+
+	frappe.db.delete(SNAPSHOT_DOCTYPE, {"snapshot_date": snapshot_date})
+
+	timestamp = now()
+	user = frappe.session.user
+	fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus", "snapshot_date", *VALUATION_FIELDS]
+	values = [
+		(
+			frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0, snapshot_date,
+			*(row[field] for field in VALUATION_FIELDS),
+		)  # fmt: skip
+		for row in valuation
+	]
+	frappe.db.bulk_insert(SNAPSHOT_DOCTYPE, fields, values, chunk_size=5000)
+	frappe.db.commit()
+
@@ -0,0 +1,151 @@
+import frappe
+from frappe.utils import cstr
+
+from systech.services.instrumentation import instrument_hook
+
+# Redis set of Item codes that have at least one barcode
+BARCODE_ITEMS_KEY = "systech_items_with_barcodes"
+# Member marking the set as built, so an empty set is not mistaken for a cold cache
+BUILT_MARKER = "__built__"
+
+# Version stamp of the barcode -> item map; workers reload their copy when it changes
+BARCODE_MAP_VERSION_KEY = "systech_barcode_map_version"
+
+# Per worker: {site: (version, {barcode: (item_code, uom, conversion_factor)})}
+_barcode_maps = {}
+
+
+@frappe.whitelist()
+def resolve_barcodes(barcodes):
+	"""
+	Resolve scanned barcodes to item, UOM and conversion factor.
+	`barcodes` is a list (or JSON list) so a whole scanned batch resolves in one call;
+	unknown barcodes map to None.
+	"""
+	frappe.has_permission("Item", "read", throw=True)
+
+	if isinstance(barcodes, str):
+		# A JSON list, or a single barcode (numeric EAN/UPC codes must stay strings)
+		barcodes = frappe.parse_json(barcodes) if barcodes.startswith("[") else [barcodes]
+
+	barcode_map = get_barcode_map()
+	resolved = {}
+	for barcode in map(cstr, barcodes):
+		match = barcode_map.get(barcode)
+		resolved[barcode] = (
+			{"item_code": match[0], "uom": match[1], "conversion_factor": match[2]} if match else None
+		)
+
+	return resolved
+
+
+def get_barcode_map():
+	"""This worker's barcode map for the current site, reloaded only when the version stamp moves."""
+	version = frappe.cache().get_value(BARCODE_MAP_VERSION_KEY)
+	if not version:
+		version = bump_barcode_map_version()
+
+	cached = _barcode_maps.get(frappe.local.site)
+	if cached and cached[0] == version:
+		return cached[1]
+
+	rows = frappe.db.sql(
+		"""
+		SELECT
+			ib.barcode,
+			ib.parent,
+			IFNULL(NULLIF(ib.uom, ''), item.stock_uom),
+			IFNULL(ucd.conversion_factor, 1)
+		FROM `tabItem Barcode` ib
+		JOIN `tabItem` item ON item.name = ib.parent
+		LEFT JOIN `tabUOM Conversion Detail` ucd
+			ON ucd.parent = ib.parent AND ucd.parenttype = 'Item' AND ucd.uom = ib.uom
+		WHERE ib.parenttype = 'Item' AND item.disabled = 0 AND IFNULL(ib.barcode, '') != ''
+	"""
+	)
+	barcode_map = {row[0]: tuple(row[1:]) for row in rows}
+
+	_barcode_maps[frappe.local.site] = (version, barcode_map)
+	return barcode_map
+
+
+def bump_barcode_map_version():
+	version = frappe.generate_hash(length=10)
+	frappe.cache().set_value(BARCODE_MAP_VERSION_KEY, version)
+	return version
+
+
+def get_barcode_signature(doc):
+	"""What the barcode map reads from an Item; any change to it needs a reload."""
+	if not doc:
+		return None
+
+	return (
+		doc.disabled,
+		doc.stock_uom,
+		sorted((d.barcode, d.uom) for d in doc.get("barcodes") or []),
+		sorted((d.uom, d.conversion_factor) for d in doc.get("uoms") or []),
+	)
+
+
+def get_items_with_barcodes(item_codes):
+	"""Return the subset of `item_codes` that have a barcode, in one Redis round trip."""
+	item_codes = [d for d in set(item_codes) if d]
+	if not item_codes:
+		return set()
+
+	cache = frappe.cache()
+	key = cache.make_key(BARCODE_ITEMS_KEY)
+
+	pipe = cache.pipeline()
+	pipe.sismember(key, BUILT_MARKER)
+	for item_code in item_codes:
+		pipe.sismember(key, item_code)
+	built, *present = pipe.execute()
+
+	if not built:
+		build_barcode_index()
+		return get_items_with_barcodes(item_codes)
+
+	return {item_code for item_code, has_barcode in zip(item_codes, present) if has_barcode}
+
+
+def get_rows_without_barcode(items):
+	"""Rows whose Item has no barcode in the system, all of them at once."""
+	with_barcodes = get_items_with_barcodes(item.item_code for item in items)
+	return [item for item in items if item.item_code and item.item_code not in with_barcodes]
+
+
+def build_barcode_index():
+	item_codes = frappe.db.sql_list(
+		"""
+		SELECT DISTINCT parent FROM `tabItem Barcode`
+		WHERE parenttype = 'Item' AND IFNULL(barcode, '') != ''
+	"""
+	)
+
+	cache = frappe.cache()
+	cache.delete_value(BARCODE_ITEMS_KEY)
+	for start in range(0, len(item_codes), 10000):
+		cache.sadd(BARCODE_ITEMS_KEY, *item_codes[start : start + 10000])
+	cache.sadd(BARCODE_ITEMS_KEY, BUILT_MARKER)
+
+
+@instrument_hook
+def update_barcode_index(doc, method=None, old_name=None, new_name=None, merge=False):
+	"""
+	Keep the items-with-barcodes set and the barcode map version in step with Item changes.
+	Hooked to: Item on_update, on_trash and after_rename
+	"""
+	if method != "on_update" or get_barcode_signature(doc) != get_barcode_signature(doc.get_doc_before_save()):
+		bump_barcode_map_version()
+
+	cache = frappe.cache()
+	if method == "after_rename":
+		cache.srem(BARCODE_ITEMS_KEY, old_name)
+		if frappe.db.exists("Item Barcode", {"parenttype": "Item", "parent": new_name}):
+			cache.sadd(BARCODE_ITEMS_KEY, new_name)
+	elif method != "on_trash" and any(d.barcode for d in doc.get("barcodes") or []):
+		cache.sadd(BARCODE_ITEMS_KEY, doc.name)
+	else:
+		cache.srem(BARCODE_ITEMS_KEY, doc.name)
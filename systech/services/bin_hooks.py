@@ -1,6 +1,9 @@
 import frappe
 from frappe.utils import flt
 
+from systech.services.instrumentation import instrument_hook
+
+@instrument_hook
 def recalculate_bin_reserved_stock(doc, method=None):
     """
     Hook to recalculate Bin's reserved stock using smart logic after any update.
@@ -0,0 +1,354 @@
+from datetime import date
+from itertools import accumulate
+
+import frappe
+from frappe import _
+from frappe.model.meta import get_field_precision
+from frappe.utils import add_months, cint, flt, get_last_day, getdate, now, nowdate
+from frappe.utils.data import is_last_day_of_the_month
+
+SCHEDULE_DOCTYPE = "Asset Depreciation Schedule"
+ROW_DOCTYPE = "Depreciation Schedule"
+
+ROW_FIELDS = ("schedule_date", "depreciation_amount", "accumulated_depreciation_amount", "journal_entry")
+FINANCE_BOOK_FIELDS = (
+	"finance_book",
+	"value_after_depreciation",
+	"total_number_of_depreciations",
+	"frequency_of_depreciation",
+	"expected_value_after_useful_life",
+)
+
+MAX_SIMULATED_ASSETS = 5000
+
+
+def rebuild_asset_schedules(asset, cutoff_date, notes, schedules=None, rows_by_schedule=None):
+	"""
+	Splice every active depreciation schedule of `asset` at `cutoff_date`.
+	Rows before the cutoff are kept, a row straddling it is split by days, and the
+	remaining periods are regenerated from the finance book's current value and life.
+	Callers that already hold the schedules and their rows can pass them in.
+	"""
+	if schedules is None:
+		schedules = get_active_schedules(asset.name)
+	if not schedules:
+		return
+
+	if rows_by_schedule is None:
+		rows_by_schedule = get_schedule_rows([d.name for d in schedules])
+	precision = asset.precision("gross_purchase_amount")
+
+	for schedule in schedules:
+		fb_row = get_finance_book_row(asset, schedule.finance_book)
+		if not fb_row:
+			continue
+
+		rows = splice_schedule(
+			rows_by_schedule.get(schedule.name, []),
+			cutoff_date,
+			asset.available_for_use_date,
+			fb_row,
+			precision,
+		)
+		write_schedule(
+			schedule.name,
+			rows,
+			{
+				"total_number_of_depreciations": fb_row.total_number_of_depreciations,
+				"frequency_of_depreciation": fb_row.frequency_of_depreciation,
+				"expected_value_after_useful_life": fb_row.expected_value_after_useful_life,
+				"notes": f"{schedule.notes}\n{notes}" if schedule.notes else notes,
+			},
+		)
+
+
+def get_active_schedules(asset_name):
+	return frappe.get_all(
+		SCHEDULE_DOCTYPE,
+		filters={"asset": asset_name, "status": "Active"},
+		fields=["name", "finance_book", "notes"],
+	)
+
+
+def get_finance_book_row(asset, finance_book):
+	"""Finance book row matching `finance_book`, else the asset's first one."""
+	for fb_row in asset.get("finance_books") or []:
+		if fb_row.finance_book == finance_book:
+			return fb_row
+
+	return asset.finance_books[0] if asset.get("finance_books") else None
+
+
+def get_schedule_rows(schedule_names):
+	"""Schedule rows of several schedules in one query: {schedule: [rows in idx order]}."""
+	rows_by_schedule = {}
+	if not schedule_names:
+		return rows_by_schedule
+
+	rows = frappe.get_all(
+		ROW_DOCTYPE,
+		filters={"parenttype": SCHEDULE_DOCTYPE, "parent": ["in", schedule_names]},
+		fields=["parent", *ROW_FIELDS],
+		order_by="parent, idx",
+	)
+	for row in rows:
+		rows_by_schedule.setdefault(row.parent, []).append(row)
+
+	return rows_by_schedule
+
+
+def splice_schedule(rows, cutoff_date, available_for_use_date, fb_row, precision):
+	"""
+	Return the full list of schedule rows (as dicts) after splicing at `cutoff_date`.
+
+	Dates are handled as day ordinals so period lengths and the straddle split are
+	plain integer differences over whole lists.
+	"""
+	cutoff = getdate(cutoff_date).toordinal()
+	start_ordinal = getdate(available_for_use_date).toordinal()
+
+	ends = [getdate(row.schedule_date).toordinal() for row in rows]
+	starts = [start_ordinal, *(end + 1 for end in ends[:-1])]
+
+	# Rows ending before the cutoff are kept; the first one ending on/after it may straddle it
+	split = next((i for i, end in enumerate(ends) if end >= cutoff), len(rows))
+	straddle = split < len(rows) and starts[split] < cutoff
+
+	preserved = [
+		frappe._dict(
+			schedule_date=row.schedule_date,
+			depreciation_amount=row.depreciation_amount,
+			journal_entry=row.journal_entry,
+		)
+		for row in rows[:split]
+	]
+
+	first_target_date = None
+	if straddle:
+		row = rows[split]
+		total_days = ends[split] - starts[split] + 1
+		old_days = cutoff - starts[split]
+
+		if old_days > 0 and total_days > 0:
+			fraction = flt(old_days) / flt(total_days)
+			preserved.append(
+				frappe._dict(
+					schedule_date=date.fromordinal(cutoff - 1),
+					depreciation_amount=flt(row.depreciation_amount) * fraction,
+					journal_entry=row.journal_entry if row.journal_entry else "",
+				)
+			)
+
+		# The rest of the straddling period becomes the first regenerated row
+		first_target_date = row.schedule_date
+
+	preserved_accumulated = list(accumulate((flt(p.depreciation_amount) for p in preserved), initial=0.0))
+	for p, accumulated in zip(preserved, preserved_accumulated[1:]):
+		p.accumulated_depreciation_amount = accumulated
+	preserved_sum = preserved_accumulated[-1]
+
+	# fb_row.value_after_depreciation already includes the revaluation but not the
+	# preserved rows that were never booked; take those off to get the value at the cutoff
+	unbooked = sum(flt(p.depreciation_amount) for p in preserved if not p.journal_entry)
+	base_value = flt(fb_row.value_after_depreciation) - unbooked
+
+	remaining_periods = flt(fb_row.total_number_of_depreciations) - len(preserved)
+	if straddle:
+		remaining_periods += 1
+
+	start_date = getdate(preserved[-1].schedule_date if preserved else available_for_use_date)
+	dates = get_schedule_dates(
+		start_date, cint(remaining_periods), cint(fb_row.frequency_of_depreciation), first_target_date
+	)
+	if not dates:
+		return preserved
+
+	ordinals = [start_date.toordinal(), *(d.toordinal() for d in dates)]
+	period_days = [b - a for a, b in zip(ordinals, ordinals[1:])]
+
+	final_value = flt(fb_row.expected_value_after_useful_life)
+	total_days = ordinals[-1] - ordinals[0]
+	daily_rate = (base_value - final_value) / total_days if total_days > 0 else 0
+
+	amounts = [flt(daily_rate * days, precision) for days in period_days]
+
+	# The last period takes whatever is left down to the salvage value
+	accumulated = list(accumulate(amounts[:-1], initial=preserved_sum))
+	amounts[-1] = flt(base_value - (accumulated[-1] - preserved_sum) - final_value, precision)
+	accumulated = list(accumulate(amounts, initial=preserved_sum))[1:]
+
+	booked = {getdate(row.schedule_date).toordinal(): row.journal_entry for row in rows if row.journal_entry}
+
+	return preserved + [
+		frappe._dict(
+			schedule_date=schedule_date,
+			depreciation_amount=amount,
+			accumulated_depreciation_amount=flt(accumulated_amount, precision),
+			journal_entry=booked.get(ordinal, ""),
+		)
+		for schedule_date, ordinal, amount, accumulated_amount in zip(dates, ordinals[1:], amounts, accumulated)
+	]
+
+
+def get_schedule_dates(start_date, periods, frequency_months, first_target_date=None):
+	"""Period end dates, stepping by `frequency_months` and sticking to month ends."""
+	dates = []
+	current = start_date
+	for i in range(periods):
+		if i == 0 and first_target_date:
+			current = getdate(first_target_date)
+		else:
+			month_end = is_last_day_of_the_month(current)
+			current = add_months(current, frequency_months)
+			if month_end:
+				current = get_last_day(current)
+
+		dates.append(current)
+
+	return dates
+
+
+def write_schedule(schedule_name, rows, header=None):
+	"""Replace the rows of a submitted schedule with one delete and one bulk insert."""
+	frappe.db.delete(ROW_DOCTYPE, {"parent": schedule_name, "parenttype": SCHEDULE_DOCTYPE})
+
+	timestamp = now()
+	user = frappe.session.user
+	fields = [
+		"name", "creation", "modified", "owner", "modified_by", "docstatus",
+		"parent", "parenttype", "parentfield", "idx", *ROW_FIELDS,
+	]  # fmt: skip
+	values = [
+		(
+			frappe.generate_hash(length=10), timestamp, timestamp, user, user, 1,
+			schedule_name, SCHEDULE_DOCTYPE, "depreciation_schedule", idx,
+			*(row.get(field) for field in ROW_FIELDS),
+		)  # fmt: skip
+		for idx, row in enumerate(rows, 1)
+	]
+	frappe.db.bulk_insert(ROW_DOCTYPE, fields, values, chunk_size=5000)
+
+	if header:
+		frappe.db.set_value(SCHEDULE_DOCTYPE, schedule_name, header)
+
+
+def simulate_revaluations(revaluations, include_rows=True):
+	"""
+	Splice the active schedules of many assets in memory, without writing anything.
+	Each revaluation is a dict with `asset`, `new_asset_value` (the value adjustment,
+	as on Asset Revaluation), optionally `new_remaining_life_months` and
+	`effective_from_date` (defaults to today).
+
+	Data is loaded set-based (assets, finance books, schedules, schedule rows: four
+	queries) whatever the number of assets.
+	"""
+	if len(revaluations) > MAX_SIMULATED_ASSETS:
+		frappe.throw(_("At most {0} assets can be simulated at once").format(MAX_SIMULATED_ASSETS))
+
+	asset_names = list({r.get("asset") for r in revaluations if r.get("asset")})
+	assets = load_assets(asset_names)
+
+	schedules = []
+	if assets:
+		schedules = frappe.get_all(
+			SCHEDULE_DOCTYPE,
+			filters={"asset": ["in", list(assets)], "status": "Active"},
+			fields=["name", "asset", "finance_book"],
+		)
+
+	schedules_by_asset = {}
+	for schedule in schedules:
+		schedules_by_asset.setdefault(schedule.asset, []).append(schedule)
+
+	rows_by_schedule = get_schedule_rows([d.name for d in schedules])
+	precision = get_field_precision(frappe.get_meta("Asset").get_field("gross_purchase_amount"))
+
+	results = []
+	for revaluation in revaluations:
+		revaluation = frappe._dict(revaluation)
+		asset = assets.get(revaluation.asset)
+		if not asset:
+			results.append({"asset": revaluation.asset, "error": _("Asset not found or not permitted")})
+			continue
+
+		# Work on copies so several scenarios for the same asset stay independent
+		asset = frappe._dict(asset, finance_books=[frappe._dict(d) for d in asset.finance_books])
+		apply_revaluation(asset, revaluation)
+
+		cutoff_date = revaluation.effective_from_date or nowdate()
+		result = {"asset": asset.name, "schedules": []}
+		for schedule in schedules_by_asset.get(asset.name, []):
+			fb_row = get_finance_book_row(asset, schedule.finance_book)
+			if not fb_row:
+				continue
+
+			rows = splice_schedule(
+				rows_by_schedule.get(schedule.name, []),
+				cutoff_date,
+				asset.available_for_use_date,
+				fb_row,
+				precision,
+			)
+			simulated = {
+				"schedule": schedule.name,
+				"finance_book": schedule.finance_book,
+				"value_after_depreciation": fb_row.value_after_depreciation,
+				"row_count": len(rows),
+				"end_date": rows[-1].schedule_date if rows else None,
+				"accumulated_depreciation": rows[-1].accumulated_depreciation_amount if rows else 0,
+			}
+			if include_rows:
+				simulated["rows"] = rows
+			result["schedules"].append(simulated)
+
+		results.append(result)
+
+	return results
+
+
+def load_assets(asset_names):
+	"""
+	Submitted assets the user can read, as dicts carrying their finance book rows
+	(in idx order). Two queries for any number of assets.
+	"""
+	if not asset_names:
+		return {}
+
+	assets = {
+		d.name: frappe._dict(d, finance_books=[])
+		for d in frappe.get_list(
+			"Asset",
+			filters={"name": ["in", asset_names], "docstatus": 1},
+			fields=["name", "available_for_use_date", "default_finance_book"],
+			limit_page_length=0,
+		)
+	}
+	if not assets:
+		return assets
+
+	finance_books = frappe.get_all(
+		"Asset Finance Book",
+		filters={"parenttype": "Asset", "parent": ["in", list(assets)]},
+		fields=["parent", *FINANCE_BOOK_FIELDS],
+		order_by="parent, idx",
+	)
+	for fb_row in finance_books:
+		assets[fb_row.parent].finance_books.append(fb_row)
+
+	return assets
+
+
+def apply_revaluation(asset, revaluation):
+	"""Apply a value adjustment and extra life to the default finance book row, as Asset Revaluation does."""
+	fb_row = get_finance_book_row(asset, asset.default_finance_book)
+	if not fb_row:
+		return
+
+	fb_row.value_after_depreciation = flt(fb_row.value_after_depreciation) + flt(revaluation.new_asset_value)
+
+	additional_months = flt(revaluation.new_remaining_life_months)
+	if additional_months:
+		frequency_months = fb_row.frequency_of_depreciation or 1
+		fb_row.total_number_of_depreciations = (
+			flt(fb_row.total_number_of_depreciations) + additional_months / frequency_months
+		)
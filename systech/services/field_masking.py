@@ -0,0 +1,247 @@
+import frappe
+from frappe.permissions import add_permission, setup_custom_perms, update_permission_property
+from frappe.utils import now
+
+# Fields hidden from a role, per DocType. Grid fields are listed under their child DocType.
+FIELD_MASKS = {
+	"Warehouse Keeper": {
+		"Item": ("valuation_rate", "standard_rate", "last_purchase_rate"),
+		"Stock Entry": ("total_amount", "total_additional_costs"),
+		"Stock Entry Detail": ("basic_rate", "basic_amount", "amount", "valuation_rate", "additional_cost"),
+		"Purchase Receipt": (
+			"base_discount_amount", "base_grand_total", "base_net_total", "base_total",
+			"base_total_taxes_and_charges", "discount_amount", "grand_total", "net_total", "total",
+			"total_taxes_and_charges", "taxes",
+		),
+		"Purchase Receipt Item": (
+			"rate", "amount", "base_rate", "base_amount", "net_rate", "net_amount", "valuation_rate",
+			"price_list_rate", "discount_amount", "discount_percentage",
+		),
+	},
+}  # fmt: skip
+
+# Masked fields move to this permission level; every role reading the DocType except the
+# masked ones is granted it. Frappe then enforces the mask on every read and write path.
+MASK_PROPERTY = "permlevel"
+MASK_PERMLEVEL = 1
+# Setters this registry owns carry the app's module, so removed masks can be found and deleted
+MASK_MODULE = "Systech"
+
+
+def get_masked_fields(masks=None):
+	"""{(doctype, fieldname): [roles the field is hidden from]}"""
+	masked = {}
+	for role, doctypes in (masks or FIELD_MASKS).items():
+		for doctype, fieldnames in doctypes.items():
+			for fieldname in fieldnames:
+				masked.setdefault((doctype, fieldname), []).append(role)
+
+	return masked
+
+
+def apply_field_masks(masks=None):
+	"""
+	Make the permission level Property Setters match the mask registry in one pass:
+	read the existing setters with one query, insert the missing ones in bulk, update
+	only those that changed, delete the ones we own whose field left the registry,
+	then grant the new level to the unmasked roles and clear each affected DocType's
+	cache once.
+	"""
+	masked = get_masked_fields(masks)
+	expected = {key: str(MASK_PERMLEVEL) for key in masked}
+
+	existing = {
+		(d.doc_type, d.field_name): d
+		for d in frappe.get_all(
+			"Property Setter",
+			filters={"doctype_or_field": "DocField", "property": MASK_PROPERTY},
+			or_filters={
+				"doc_type": ["in", list({doctype for doctype, _fieldname in expected}) or [""]],
+				"module": MASK_MODULE,
+			},
+			fields=["name", "doc_type", "field_name", "value", "module"],
+		)
+	}
+
+	to_insert = [key for key in expected if key not in existing]
+	to_update = [
+		key
+		for key in expected
+		if key in existing and (existing[key].value != expected[key] or existing[key].module != MASK_MODULE)
+	]
+	to_delete = [key for key, d in existing.items() if key not in expected and d.module == MASK_MODULE]
+
+	if to_insert:
+		insert_property_setters(to_insert, expected)
+	if to_update:
+		update_property_setters({existing[key].name: expected[key] for key in to_update})
+	if to_delete:
+		frappe.db.delete("Property Setter", {"name": ["in", [existing[key].name for key in to_delete]]})
+
+	changed = grant_mask_permlevel(masked) if masked else set()
+
+	for doctype in sorted({doctype for doctype, _fieldname in to_insert + to_update + to_delete} | changed):
+		frappe.clear_cache(doctype=doctype)
+
+
+def insert_property_setters(keys, expected):
+	timestamp = now()
+	user = frappe.session.user
+	property_type = frappe.get_meta("DocField").get_field(MASK_PROPERTY).fieldtype
+
+	fields = [
+		"name", "creation", "modified", "owner", "modified_by", "docstatus", "is_system_generated", "module",
+		"doctype_or_field", "doc_type", "field_name", "property", "property_type", "value",
+	]  # fmt: skip
+	values = [
+		(
+			f"{doctype}-{fieldname}-{MASK_PROPERTY}", timestamp, timestamp, user, user, 0, 1, MASK_MODULE,
+			"DocField", doctype, fieldname, MASK_PROPERTY, property_type, expected[(doctype, fieldname)],
+		)  # fmt: skip
+		for doctype, fieldname in keys
+	]
+	frappe.db.bulk_insert("Property Setter", fields, values)
+
+
+def update_property_setters(values_by_name):
+	"""Set new values on several Property Setters in one statement, claiming them for the mask registry."""
+	cases = " ".join(["WHEN %s THEN %s"] * len(values_by_name))
+	params = [param for name, value in values_by_name.items() for param in (name, value)]
+
+	frappe.db.sql(
+		f"""
+		UPDATE `tabProperty Setter`
+		SET value = CASE name {cases} END, module = %s, is_system_generated = 1, modified = %s, modified_by = %s
+		WHERE name IN ({", ".join(["%s"] * len(values_by_name))})
+	""",
+		[*params, MASK_MODULE, now(), frappe.session.user, *values_by_name],
+	)
+
+
+def get_permission_doctypes(doctype):
+	"""DocTypes whose permissions govern `doctype`'s fields: itself, or the parents of a child table."""
+	if not frappe.get_meta(doctype).istable:
+		return [doctype]
+
+	return frappe.get_all(
+		"DocField",
+		filters={"fieldtype": ["in", ["Table", "Table MultiSelect"]], "options": doctype, "parenttype": "DocType"},
+		pluck="parent",
+		distinct=True,
+	)
+
+
+def grant_mask_permlevel(masked):
+	"""
+	Give MASK_PERMLEVEL to every role that can read a masked DocType at level 0
+	(write too where it can write), and take it away from the masked roles.
+	Returns the DocTypes whose permissions changed.
+	"""
+	masked_roles = {}
+	for (doctype, _fieldname), roles in masked.items():
+		for permission_doctype in get_permission_doctypes(doctype):
+			masked_roles.setdefault(permission_doctype, set()).update(roles)
+
+	changed = set()
+	for doctype, roles in sorted(masked_roles.items()):
+		perms = get_doctype_perms(doctype)
+		granted = {perm.role: perm for perm in perms if perm.permlevel == MASK_PERMLEVEL and not perm.if_owner}
+
+		for perm in perms:
+			if perm.permlevel or perm.if_owner or not perm.read or perm.role in roles:
+				continue
+
+			if perm.role not in granted:
+				add_permission(doctype, perm.role, MASK_PERMLEVEL)
+				changed.add(doctype)
+			if perm.write and not (granted.get(perm.role) or {}).get("write"):
+				update_permission_property(doctype, perm.role, MASK_PERMLEVEL, "write", 1)
+				changed.add(doctype)
+
+		revoke = [role for role in granted if role in roles]
+		if revoke:
+			setup_custom_perms(doctype)
+			frappe.db.delete(
+				"Custom DocPerm", {"parent": doctype, "permlevel": MASK_PERMLEVEL, "role": ["in", revoke]}
+			)
+			changed.add(doctype)
+
+	return changed
+
+
+def get_doctype_perms(doctype):
+	"""The rules in force for `doctype`: its Custom DocPerms once customised, else the standard DocPerms."""
+	table = "Custom DocPerm" if frappe.db.exists("Custom DocPerm", {"parent": doctype}) else "DocPerm"
+	return frappe.get_all(
+		table, filters={"parent": doctype}, fields=["role", "permlevel", "if_owner", "read", "write"]
+	)
+
+
+def get_hidden_fields(doctype):
+	"""Fieldnames of `doctype` above the permission levels the session user can read."""
+	meta = frappe.get_meta(doctype)
+	readable = meta.get_permlevel_access("read")
+
+	return {df.fieldname for df in meta.fields if df.permlevel not in readable}
+
+
+def mask_rows(keys, rows, hidden_keys):
+	"""Drop the columns named in `hidden_keys` from list-shaped rows; returns (kept indexes, rows)."""
+	keep = [i for i, key in enumerate(keys) if key not in hidden_keys]
+	if len(keep) == len(keys):
+		return keep, rows
+
+	return keep, [[row[i] for i in keep] for row in rows]
+
+
+@frappe.whitelist()
+def get_report_data(
+	report_name,
+	filters=None,
+	user=None,
+	ignore_prepared_report=False,
+	custom_columns=None,
+	is_tree=False,
+	parent_field=None,
+	are_default_filters=True,
+):
+	"""
+	Override of frappe.desk.query_report.run that strips the ref DocType's columns the
+	user cannot read. Script reports select their own columns, so permission levels
+	do not reach them otherwise.
+	"""
+	from frappe.desk.query_report import run
+
+	result = run(
+		report_name,
+		filters=filters,
+		user=user,
+		ignore_prepared_report=ignore_prepared_report,
+		custom_columns=custom_columns,
+		is_tree=is_tree,
+		parent_field=parent_field,
+		are_default_filters=are_default_filters,
+	)
+
+	ref_doctype = frappe.get_cached_value("Report", report_name, "ref_doctype")
+	if frappe.session.user == "Administrator" or not ref_doctype:
+		return result
+	if not isinstance(result, dict) or not result.get("result"):
+		return result
+
+	hidden = get_hidden_fields(ref_doctype)
+	if not hidden:
+		return result
+
+	columns = result.get("columns") or []
+	fieldnames = [c.get("fieldname") if isinstance(c, dict) else str(c).split(":")[0] for c in columns]
+
+	rows = result["result"]
+	if isinstance(rows[0], dict):
+		result["result"] = [{k: v for k, v in row.items() if k not in hidden} for row in rows]
+		result["columns"] = [c for c, fieldname in zip(columns, fieldnames) if fieldname not in hidden]
+	else:
+		keep, result["result"] = mask_rows(fieldnames, rows, hidden)
+		result["columns"] = [columns[i] for i in keep]
+
+	return result
@@ -0,0 +1,150 @@
+import time
+from datetime import timedelta
+from functools import wraps
+
+import frappe
+from frappe.utils import cint, flt, now_datetime
+
+# Hourly Redis hashes of hook timings: systech_hook_stats|<YYYYMMDDHH>
+STATS_KEY = "systech_hook_stats"
+# Hours of history kept; older buckets expire on their own
+HISTORY_HOURS = 24
+# Upper bounds (ms) of the latency histogram buckets
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class QueryCounter:
+	"""
+	Count the statements run through frappe.db.sql, and the rows they returned or
+	touched, while active. Nested counters all see the inner statements.
+	"""
+
+	def __init__(self):
+		self.queries = 0
+		self.rows = 0
+
+	def __enter__(self):
+		db = frappe.db
+		self._previous = db.__dict__.get("sql")
+		sql = db.sql
+
+		def counting_sql(*args, **kwargs):
+			result = sql(*args, **kwargs)
+			self.queries += 1
+			self.rows += max(cint(getattr(db._cursor, "rowcount", 0)), 0)
+			return result
+
+		db.sql = counting_sql
+		return self
+
+	def __exit__(self, *exc_info):
+		if self._previous is None:
+			frappe.db.__dict__.pop("sql", None)
+		else:
+			frappe.db.sql = self._previous
+
+
+def instrument_hook(fn):
+	"""
+	Record wall time, query count and rows of every call of a doc_events handler
+	in the hourly hook stats, keyed by handler path and document type.
+	"""
+	hook = f"{fn.__module__}.{fn.__name__}"
+
+	@wraps(fn)
+	def wrapper(*args, **kwargs):
+		if not frappe.db or frappe.conf.get("disable_systech_hook_instrumentation"):
+			return fn(*args, **kwargs)
+
+		doc = args[0] if args else kwargs.get("doc")
+		counter = QueryCounter()
+		start = time.perf_counter()
+		try:
+			with counter:
+				return fn(*args, **kwargs)
+		finally:
+			elapsed_ms = (time.perf_counter() - start) * 1000
+			record_hook_timing(hook, getattr(doc, "doctype", None), elapsed_ms, counter.queries, counter.rows)
+
+	return wrapper
+
+
+def get_bucket(elapsed_ms):
+	return next((str(bound) for bound in LATENCY_BUCKETS if elapsed_ms <= bound), "inf")
+
+
+def record_hook_timing(hook, doctype, elapsed_ms, queries, rows):
+	"""Add one call to the current hour's stats in a single pipelined round trip."""
+	try:
+		cache = frappe.cache()
+		key = cache.make_key(f"{STATS_KEY}|{now_datetime():%Y%m%d%H}")
+		prefix = f"{hook}|{doctype or ''}|"
+
+		pipe = cache.pipeline()
+		pipe.hincrby(key, prefix + "calls", 1)
+		pipe.hincrbyfloat(key, prefix + "time_ms", elapsed_ms)
+		pipe.hincrby(key, prefix + "queries", queries)
+		pipe.hincrby(key, prefix + "rows", rows)
+		pipe.hincrby(key, prefix + "le_" + get_bucket(elapsed_ms), 1)
+		pipe.expire(key, (HISTORY_HOURS + 1) * 3600)
+		pipe.execute()
+	except Exception:
+		# Instrumentation must never fail the save it is measuring
+		pass
+
+
+@frappe.whitelist()
+def get_hook_stats(hours=HISTORY_HOURS):
+	"""
+	Per (hook, doctype) totals and averages over the last `hours` hours, with
+	p50/p95 latency estimated from the histogram buckets, slowest first.
+	"""
+	frappe.only_for("System Manager")
+
+	hours = min(max(cint(hours), 1), HISTORY_HOURS)
+	current = now_datetime()
+	cache = frappe.cache()
+
+	pipe = cache.pipeline()
+	for offset in range(hours):
+		pipe.hgetall(cache.make_key(f"{STATS_KEY}|{current - timedelta(hours=offset):%Y%m%d%H}"))
+
+	stats = {}
+	for data in pipe.execute():
+		for field, value in (data or {}).items():
+			hook, doctype, metric = frappe.safe_decode(field).split("|")
+			row = stats.setdefault(
+				(hook, doctype),
+				{"hook": hook, "doctype": doctype, "calls": 0, "time_ms": 0.0, "queries": 0, "rows": 0, "buckets": {}},
+			)
+			value = flt(frappe.safe_decode(value))
+			if metric.startswith("le_"):
+				row["buckets"][metric[3:]] = row["buckets"].get(metric[3:], 0) + value
+			else:
+				row[metric] += value
+
+	for row in stats.values():
+		calls = row["calls"] or 1
+		row["avg_ms"] = flt(row["time_ms"] / calls, 2)
+		row["avg_queries"] = flt(row["queries"] / calls, 2)
+		row["avg_rows"] = flt(row["rows"] / calls, 2)
+		row["p50_ms"] = get_percentile(row["buckets"], row["calls"], 0.5)
+		row["p95_ms"] = get_percentile(row["buckets"], row["calls"], 0.95)
+		row["buckets"] = [[label, cint(row["buckets"].get(label))] for label in get_bucket_labels()]
+
+	return {"hours": hours, "hooks": sorted(stats.values(), key=lambda row: row["time_ms"], reverse=True)}
+
+
+def get_bucket_labels():
+	return [*(str(bound) for bound in LATENCY_BUCKETS), "inf"]
+
+
+def get_percentile(buckets, calls, fraction):
+	"""Upper bound (ms) of the bucket holding the given fraction of calls; None past the last bound."""
+	seen = 0
+	for label in get_bucket_labels():
+		seen += buckets.get(label, 0)
+		if calls and seen >= calls * fraction:
+			return None if label == "inf" else cint(label)
+
+	return None
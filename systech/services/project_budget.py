@@ -2,46 +2,246 @@ import frappe
 from frappe import _
 from frappe.utils import flt
 
+from systech.services.instrumentation import instrument_hook
+
+# Rolled-up budget fields maintained on every Project:
+#   sub_project_budget       - sum of the direct sub-projects' estimated_costing
+#   total_sub_project_budget - the same over every level below
+ROLLUP_FIELDS = ("sub_project_budget", "total_sub_project_budget")
+# Submitted purchase spend booked against the project, kept by the Purchase Invoice hooks
+SPEND_FIELD = "actual_spend"
+
+
+@instrument_hook
 def validate_project_budget(doc, method):
     """
-    Validate that the sum of sub-projects budget does not exceed the parent project's budget.
+    Validate that the sum of sub-projects budget does not exceed the parent project's budget,
+    and that a project's own budget is not reduced below its sub-projects' total.
     Hooked to: Project.validate
     """
-    # 1. Check if Parent Project exists
+    before = doc.get_doc_before_save()
+
+    # Rollups and spend are only written by the hooks below; never trust the values coming from the form
+    stored_fields = (*ROLLUP_FIELDS, SPEND_FIELD)
+    rollup = frappe.db.get_value("Project", doc.name, stored_fields, as_dict=True) if before else None
+    for fieldname in stored_fields:
+        doc.set(fieldname, flt(rollup.get(fieldname)) if rollup else 0)
+
+    # 1. Downward: own budget must still cover the direct sub-projects
+    if before and flt(doc.estimated_costing) != flt(before.estimated_costing):
+        if flt(doc.sub_project_budget) > flt(doc.estimated_costing):
+            frappe.throw(_("Budget ({0}) cannot be less than the total budget of its sub-projects ({1})").format(
+                frappe.format_value(flt(doc.estimated_costing), dict(fieldtype='Currency')),
+                frappe.format_value(flt(doc.sub_project_budget), dict(fieldtype='Currency'))
+            ))
+
+    # 2. Upward: the parent's budget must cover all its sub-projects, this one included
     if not doc.parent_project:
         return
 
-    parent_project = frappe.get_doc("Project", doc.parent_project)
-    
-    # 2. Get Parent Budget
-    parent_budget = flt(parent_project.estimated_costing)
-    if parent_budget <= 0:
-        # If parent has no budget, we might want to allow or block. 
-        # User requirement: "Parent project it can have the budget". 
-        # Usually implies if parent has budget, respect it. If 0, maybe unlimited? 
-        # Let's assume strict control if set. If 0, warn? 
-        # Requirement says "its sub projects budgets sum should not exceed the parent project budget".
-        # If parent is 0, then sub-projects cannot have budget > 0.
-        pass
-
-    # 3. Calculate sum of ALL sub-projects (including current one)
-    # We need to exclude the current doc from DB if it exists (update scenario) 
-    # and add the new value from the doc instance.
-    
-    sub_projects = frappe.db.sql("""
-        SELECT name, estimated_costing 
-        FROM `tabProject` 
-        WHERE parent_project = %s AND name != %s
-    """, (doc.parent_project, doc.name), as_dict=True)
-
-    current_sub_projects_total = sum(flt(p.estimated_costing) for p in sub_projects)
-    
+    parent = frappe.db.get_value(
+        "Project", doc.parent_project, ["estimated_costing", "sub_project_budget"], as_dict=True
+    )
+    parent_budget = flt(parent.estimated_costing)
+
+    # If parent is 0, then sub-projects cannot have budget > 0.
+    current_sub_projects_total = flt(parent.sub_project_budget)
+    if before and before.parent_project == doc.parent_project:
+        current_sub_projects_total -= flt(before.estimated_costing)
+
     new_total = current_sub_projects_total + flt(doc.estimated_costing)
 
-    # 4. Compare
     if new_total > parent_budget:
         frappe.throw(_("Total budget of sub-projects ({0}) exceeds Parent Project budget ({1}). Available: {2}").format(
             frappe.format_value(new_total, dict(fieldtype='Currency')),
             frappe.format_value(parent_budget, dict(fieldtype='Currency')),
             frappe.format_value(parent_budget - current_sub_projects_total, dict(fieldtype='Currency'))
         ))
+
+
+@instrument_hook
+def update_budget_rollup(doc, method=None):
+    """
+    Apply this project's budget change to its parent chain by delta.
+    Hooked to: Project.on_update and Project.on_trash
+    """
+    before = doc.get_doc_before_save() if method != "on_trash" else doc
+
+    old_parent = before.parent_project if before else None
+    old_budget = flt(before.estimated_costing) if before else 0
+    old_subtree = old_budget + flt(before.total_sub_project_budget) if before else 0
+
+    if method == "on_trash":
+        new_parent, new_budget, new_subtree = None, 0, 0
+    else:
+        new_parent = doc.parent_project
+        new_budget = flt(doc.estimated_costing)
+        new_subtree = new_budget + flt(doc.total_sub_project_budget)
+
+    if old_parent == new_parent:
+        add_to_ancestors(new_parent, new_budget - old_budget, new_subtree - old_subtree)
+    else:
+        add_to_ancestors(old_parent, -old_budget, -old_subtree)
+        add_to_ancestors(new_parent, new_budget, new_subtree)
+
+
+def add_to_ancestors(parent_project, direct_delta, subtree_delta):
+    """Add the deltas to the direct parent and the recursive total of every ancestor."""
+    if not parent_project or not (direct_delta or subtree_delta):
+        return
+
+    if direct_delta:
+        frappe.db.sql("""
+            UPDATE `tabProject` SET sub_project_budget = IFNULL(sub_project_budget, 0) + %s
+            WHERE name = %s
+        """, (direct_delta, parent_project))
+
+    if not subtree_delta:
+        return
+
+    seen = set()
+    while parent_project and parent_project not in seen:
+        seen.add(parent_project)
+        frappe.db.sql("""
+            UPDATE `tabProject` SET total_sub_project_budget = IFNULL(total_sub_project_budget, 0) + %s
+            WHERE name = %s
+        """, (subtree_delta, parent_project))
+        parent_project = frappe.db.get_value("Project", parent_project, "parent_project")
+
+
+def rebuild_budget_rollup():
+    """Recompute both rollups for every project from the estimated budgets."""
+    projects = frappe.get_all("Project", fields=["name", "parent_project", "estimated_costing"])
+    children = {}
+    for project in projects:
+        if project.parent_project:
+            children.setdefault(project.parent_project, []).append(project)
+
+    totals = {}
+
+    def get_total(name, path=()):
+        if name not in totals:
+            # path guards against parent_project cycles in bad data
+            totals[name] = sum(
+                flt(child.estimated_costing) + get_total(child.name, path + (name,))
+                for child in children.get(name, [])
+                if child.name not in path
+            )
+        return totals[name]
+
+    for project in projects:
+        direct = sum(flt(child.estimated_costing) for child in children.get(project.name, []))
+        frappe.db.set_value(
+            "Project",
+            project.name,
+            {"sub_project_budget": direct, "total_sub_project_budget": get_total(project.name)},
+            update_modified=False,
+        )
+
+
+def get_invoice_spend(doc):
+    """{project: net spend in company currency} of a Purchase Invoice, by line project else header project."""
+    spend = {}
+    for item in doc.items:
+        project = item.get("project") or doc.project
+        if project:
+            spend[project] = spend.get(project, 0) + flt(item.base_net_amount)
+
+    return spend
+
+
+@instrument_hook
+def validate_purchase_budget(doc, method):
+    """
+    Block a purchase invoice that would take a project past its remaining budget,
+    for projects with "Block Spend Over Budget" set. Reads only the project rows;
+    the spend already booked comes from the accumulator, not from past invoices.
+    Hooked to: Purchase Invoice.validate
+    """
+    spend = get_invoice_spend(doc)
+    if not spend:
+        return
+
+    projects = frappe.get_all(
+        "Project",
+        filters={"name": ["in", list(spend)], "block_over_budget_spend": 1},
+        fields=["name", "estimated_costing", SPEND_FIELD],
+        # Serialise concurrent submissions against the same project
+        for_update=doc.docstatus == 1,
+    )
+
+    for project in projects:
+        remaining = flt(project.estimated_costing) - flt(project.get(SPEND_FIELD))
+        if flt(spend[project.name]) > remaining:
+            frappe.throw(_("Spend of {0} against Project {1} exceeds its remaining budget of {2}").format(
+                frappe.format_value(flt(spend[project.name]), dict(fieldtype='Currency')),
+                frappe.bold(project.name),
+                frappe.format_value(remaining, dict(fieldtype='Currency'))
+            ), title=_("Project Budget Exceeded"))
+
+
+@instrument_hook
+def update_project_spend(doc, method=None):
+    """
+    Add the invoice's spend to its projects, or take it back on cancel.
+    Hooked to: Purchase Invoice.on_submit and Purchase Invoice.on_cancel
+    """
+    sign = -1 if method == "on_cancel" else 1
+    for project, amount in get_invoice_spend(doc).items():
+        frappe.db.sql(f"""
+            UPDATE `tabProject` SET {SPEND_FIELD} = IFNULL({SPEND_FIELD}, 0) + %s
+            WHERE name = %s
+        """, (sign * amount, project))
+
+
+@frappe.whitelist()
+def get_budget_utilization(projects):
+    """
+    Budget, spend so far, remaining budget and utilization % of the given projects,
+    read straight from the Project rows.
+    """
+    if isinstance(projects, str):
+        # A JSON list of names, or a single project name
+        projects = frappe.parse_json(projects) if projects.startswith("[") else [projects]
+
+    rows = frappe.get_list(
+        "Project",
+        filters={"name": ["in", projects]},
+        fields=["name", "estimated_costing", SPEND_FIELD, "block_over_budget_spend"],
+    )
+
+    utilization = {}
+    for row in rows:
+        budget = flt(row.estimated_costing)
+        spent = flt(row.get(SPEND_FIELD))
+        utilization[row.name] = {
+            "budget": budget,
+            "actual_spend": spent,
+            "remaining": budget - spent,
+            "utilization": flt(spent * 100 / budget, 2) if budget else None,
+            "block_over_budget_spend": row.block_over_budget_spend,
+        }
+
+    return utilization
+
+
+def rebuild_project_spend(project=None):
+    """Recompute the spend accumulator from submitted purchase invoices (backfill and repair)."""
+    condition = "AND COALESCE(NULLIF(item.project, ''), inv.project) = %(project)s" if project else ""
+
+    spend = frappe.db.sql(f"""
+        SELECT COALESCE(NULLIF(item.project, ''), inv.project) as project, SUM(item.base_net_amount) as amount
+        FROM `tabPurchase Invoice Item` item
+        JOIN `tabPurchase Invoice` inv ON item.parent = inv.name
+        WHERE inv.docstatus = 1
+        {condition}
+        GROUP BY COALESCE(NULLIF(item.project, ''), inv.project)
+        HAVING project IS NOT NULL AND project != ''
+    """, {"project": project}, as_dict=True)
+
+    frappe.db.sql(
+        f"UPDATE `tabProject` SET {SPEND_FIELD} = 0 {'WHERE name = %(project)s' if project else ''}",
+        {"project": project},
+    )
+    for row in spend:
+        frappe.db.set_value("Project", row.project, SPEND_FIELD, flt(row.amount), update_modified=False)
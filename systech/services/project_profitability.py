@@ -0,0 +1,196 @@
+import frappe
+from frappe.utils import flt, get_first_day, get_last_day, getdate, now
+
+from systech.services.instrumentation import instrument_hook
+
+FACT_DOCTYPE = "Project Profitability Fact"
+# Project an invoice line belongs to: its own, else its invoice's
+LINE_PROJECT = "COALESCE(NULLIF(inv_item.project, ''), inv.project)"
+
+
+@instrument_hook
+def update_project_profitability(doc, method=None):
+	"""
+	Apply the invoice lines to the per-(project, item, month) profitability facts.
+	Each line counts towards its own project, else the invoice's.
+	Hooked to: Sales Invoice / Purchase Invoice on_submit and on_cancel
+	"""
+	side = "sales" if doc.doctype == "Sales Invoice" else "cost"
+	sign = -1 if method == "on_cancel" else 1
+	period = get_first_day(doc.posting_date)
+
+	totals = {}
+	for item in doc.items:
+		project = item.get("project") or doc.project
+		# NULL item codes slip past the unique key and would duplicate facts on upsert
+		if not (project and item.item_code):
+			continue
+		row = totals.setdefault((project, item.item_code), {"item_name": item.item_name, "qty": 0.0, "amount": 0.0})
+		row["qty"] += sign * flt(item.qty)
+		row["amount"] += sign * flt(item.base_amount)
+
+	if not totals:
+		return
+
+	upsert_facts(period, side, totals)
+
+	if sign < 0:
+		# Drop rows fully reversed by the cancellation to keep the table compact;
+		# float sums rarely come back to exactly zero
+		projects = list({project for project, _item_code in totals})
+		frappe.db.sql(
+			f"""
+			DELETE FROM `tab{FACT_DOCTYPE}`
+			WHERE project IN ({", ".join(["%s"] * len(projects))}) AND period = %s
+			AND ABS(sales_qty) < 0.0001 AND ABS(sales_amount) < 0.0001
+			AND ABS(cost_qty) < 0.0001 AND ABS(cost_amount) < 0.0001
+		""",
+			(*projects, period),
+		)
+
+
+def upsert_facts(period, side, totals):
+	"""Add qty/amount deltas for one month, keyed by (project, item code), in a single statement."""
+	if not totals:
+		return
+
+	timestamp = now()
+	user = frappe.session.user
+	values = []
+	params = []
+	for (project, item_code), row in totals.items():
+		values.append("(%s, %s, %s, %s, %s, 0, %s, %s, %s, %s, %s, %s)")
+		params.extend(
+			[
+				frappe.generate_hash(length=10),
+				timestamp,
+				timestamp,
+				user,
+				user,
+				project,
+				item_code,
+				row["item_name"],
+				period,
+				row["qty"],
+				row["amount"],
+			]
+		)
+
+	frappe.db.sql(
+		f"""
+		INSERT INTO `tab{FACT_DOCTYPE}`
+			(name, creation, modified, owner, modified_by, docstatus,
+			project, item_code, item_name, period, {side}_qty, {side}_amount)
+		VALUES {", ".join(values)}
+		ON DUPLICATE KEY UPDATE
+			{side}_qty = {side}_qty + VALUES({side}_qty),
+			{side}_amount = {side}_amount + VALUES({side}_amount),
+			modified = VALUES(modified)
+	""",
+		params,
+	)
+
+
+def covers_whole_months(from_date, to_date):
+	"""True when the date range can be answered from monthly facts."""
+	if not (from_date and to_date):
+		return True
+
+	return getdate(from_date) == get_first_day(from_date) and getdate(to_date) == get_last_day(to_date)
+
+
+def get_invoice_conditions(filters, project_field="inv.project"):
+	"""
+	Build the invoice WHERE clause for the projects selected by report filters.
+	Projects are matched through a sub-query on `tabProject` so the statement
+	stays the same size no matter how many projects are in scope.
+	Queries over invoice lines pass LINE_PROJECT to attribute lines as the facts do.
+	"""
+	conditions, params = get_project_conditions(filters, project_field, "inv.posting_date")
+	conditions = ["inv.docstatus = 1", f"{project_field} IS NOT NULL", f"{project_field} != ''", *conditions]
+
+	return " AND ".join(conditions), params
+
+
+def get_fact_conditions(filters):
+	"""The same selection as get_invoice_conditions, over the monthly profitability facts."""
+	conditions, params = get_project_conditions(filters, "fact.project", "fact.period")
+
+	return " AND ".join(conditions) or "1 = 1", params
+
+
+def get_project_conditions(filters, project_field, date_field):
+	conditions = []
+	params = {}
+
+	if filters.get("project"):
+		conditions.append(f"{project_field} = %(project)s")
+		params["project"] = filters.get("project")
+	if filters.get("customer"):
+		conditions.append(f"{project_field} IN (SELECT name FROM `tabProject` WHERE customer = %(customer)s)")
+		params["customer"] = filters.get("customer")
+	if filters.get("from_date") and filters.get("to_date"):
+		conditions.append(f"{date_field} BETWEEN %(from_date)s AND %(to_date)s")
+		params["from_date"] = filters.get("from_date")
+		params["to_date"] = filters.get("to_date")
+
+	return conditions, params
+
+
+def rebuild_project_profitability(project=None):
+	"""
+	Recompute the facts from submitted invoices.
+	Used for the initial backfill and to repair a project after manual data fixes.
+	"""
+	condition = (
+		f"AND {LINE_PROJECT} = %(project)s" if project else f"AND {LINE_PROJECT} IS NOT NULL AND {LINE_PROJECT} != ''"
+	)
+
+	facts = {}
+	for doctype, side in (("Sales Invoice", "sales"), ("Purchase Invoice", "cost")):
+		rows = frappe.db.sql(
+			f"""
+			SELECT
+				{LINE_PROJECT} as project,
+				inv_item.item_code,
+				inv_item.item_name,
+				DATE_FORMAT(inv.posting_date, '%%Y-%%m-01') as period,
+				SUM(inv_item.qty) as qty,
+				SUM(inv_item.base_amount) as amount
+			FROM `tab{doctype} Item` inv_item
+			JOIN `tab{doctype}` inv ON inv_item.parent = inv.name
+			WHERE inv.docstatus = 1
+			AND inv_item.item_code IS NOT NULL AND inv_item.item_code != ''
+			{condition}
+			GROUP BY {LINE_PROJECT}, inv_item.item_code, period
+		""",
+			{"project": project},
+			as_dict=True,
+		)
+
+		for row in rows:
+			fact = facts.setdefault(
+				(row.project, row.item_code, row.period),
+				{"item_name": row.item_name, "sales_qty": 0.0, "sales_amount": 0.0, "cost_qty": 0.0, "cost_amount": 0.0},
+			)
+			fact[f"{side}_qty"] = flt(row.qty)
+			fact[f"{side}_amount"] = flt(row.amount)
+
+	frappe.db.delete(FACT_DOCTYPE, {"project": project} if project else None)
+
+	timestamp = now()
+	user = frappe.session.user
+	fields = [
+		"name", "creation", "modified", "owner", "modified_by", "docstatus",
+		"project", "item_code", "item_name", "period",
+		"sales_qty", "sales_amount", "cost_qty", "cost_amount",
+	]  # fmt: skip
+	values = [
+		(
+			frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0,
+			key[0], key[1], fact["item_name"], key[2],
+			fact["sales_qty"], fact["sales_amount"], fact["cost_qty"], fact["cost_amount"],
+		)  # fmt: skip
+		for key, fact in facts.items()
+	]
+	frappe.db.bulk_insert(FACT_DOCTYPE, fields, values, chunk_size=5000)
@@ -0,0 +1,89 @@
+import hashlib
+import json
+from functools import wraps
+
+import frappe
+from frappe import _
+from frappe.utils import format_datetime, now_datetime
+
+from systech.services.instrumentation import instrument_hook
+
+CACHE_TTL = 10 * 60
+VERSIONS_KEY = "systech_report_source_versions"
+
+# Transactions that post stock ledger entries and move Bin quantities. ERPNext updates
+# those two through direct writes, so their own doc events do not fire reliably.
+STOCK_TRANSACTIONS = (
+	"Stock Entry", "Purchase Receipt", "Delivery Note", "Stock Reconciliation",
+	# with update_stock set
+	"Purchase Invoice", "Sales Invoice",
+)  # fmt: skip
+
+# Doctypes each report reads from; a change to any of them retires cached results
+REPORT_SOURCES = {
+	"Project General Report": ("Project", "Sales Invoice", "Purchase Invoice"),
+	"Project Detailed Report": ("Project", "Sales Invoice", "Purchase Invoice"),
+	"Supplier General Report": ("Purchase Invoice", "Payment Entry", "Journal Entry", "Item"),
+	"Supplier Detailed Report": ("Purchase Invoice", "Item"),
+	"Warehouse Inventory Report": (*STOCK_TRANSACTIONS, "Item"),
+	"Warehouse Stock Ledger": (*STOCK_TRANSACTIONS, "Item"),
+}
+
+
+def cached_report(report_name):
+	"""
+	Cache a script report's `execute` result per (report, filters, role scope).
+	Cached results expire after CACHE_TTL or as soon as a source doctype changes,
+	and the report message shows when the result was computed.
+	"""
+
+	def decorator(execute):
+		@wraps(execute)
+		def wrapper(filters=None):
+			filters = frappe._dict(filters or {})
+			cache = frappe.cache()
+			key = get_cache_key(report_name, filters)
+
+			cached = cache.get_value(key)
+			if cached is None:
+				cached = {"result": execute(filters), "computed_at": now_datetime()}
+				cache.set_value(key, cached, expires_in_sec=CACHE_TTL)
+
+			return add_computed_at(cached["result"], cached["computed_at"])
+
+		return wrapper
+
+	return decorator
+
+
+def get_cache_key(report_name, filters):
+	versions = frappe.cache().hgetall(VERSIONS_KEY) or {}
+	payload = {
+		"filters": {k: v for k, v in sorted(filters.items()) if v not in (None, "", [])},
+		"roles": sorted(frappe.get_roles()),
+		"versions": [versions.get(doctype) for doctype in REPORT_SOURCES.get(report_name, ())],
+	}
+	digest = hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+	return f"systech_report_cache|{report_name}|{digest}"
+
+
+def add_computed_at(result, computed_at):
+	result = list(result)
+	while len(result) < 3:
+		result.append(None)
+
+	note = _("Last computed at {0}").format(format_datetime(computed_at))
+	result[2] = f"{result[2]}<br>{note}" if result[2] else note
+
+	return tuple(result)
+
+
+@instrument_hook
+def invalidate_report_cache(doc, method=None, *args):
+	"""
+	Retire cached results of every report that reads this doctype.
+	Hooked to: submit/cancel/update events of the report source doctypes, and
+	Item on_trash / after_rename (which passes the old and new names as well)
+	"""
+	frappe.cache().hset(VERSIONS_KEY, doc.doctype, frappe.generate_hash(length=8))
@@ -0,0 +1,133 @@
+import frappe
+from frappe import _
+from frappe.core.doctype.page.page import get_custom_allowed_roles
+from frappe.utils import cstr, escape_html, has_common, now_datetime
+from frappe.utils.pdf import get_pdf
+from frappe.utils.xlsxutils import make_xlsx
+
+from systech.api.email import get_party_emails
+
+SEND_BATCH_SIZE = 100
+
+REPORT_TABLE_TEMPLATE = """
+<h3>{{ title }}</h3>
+<table class="table table-bordered" style="width: 100%; border-collapse: collapse; font-size: 11px;">
+	<thead>
+		<tr>{% for column in columns %}<th>{{ column.label }}</th>{% endfor %}</tr>
+	</thead>
+	<tbody>
+		{% for row in rows %}
+		<tr>{% for value in row %}<td>{{ value }}</td>{% endfor %}</tr>
+		{% endfor %}
+	</tbody>
+</table>
+"""
+
+
+def send_due_report_emails():
+	"""
+	Queue every enabled Report Email Schedule that is due.
+	Hooked to: scheduler_events daily
+	"""
+	for name in frappe.get_all("Report Email Schedule", filters={"enabled": 1}, pluck="name"):
+		schedule = frappe.get_doc("Report Email Schedule", name)
+		if schedule.is_due():
+			frappe.enqueue(
+				"systech.services.report_mailer.send_report_schedule",
+				queue="long",
+				timeout=3600,
+				schedule_name=name,
+			)
+
+
+def send_report_schedule(schedule_name):
+	"""
+	Render the report once per distinct filter set and queue the emails.
+	The report runs as the schedule's owner, so it only ever sees what they can.
+	"""
+	schedule = frappe.get_doc("Report Email Schedule", schedule_name)
+	if not can_run_report(schedule.report, schedule.owner):
+		frappe.throw(_("{0} is no longer permitted to run Report {1}").format(schedule.owner, schedule.report))
+
+	current_user = frappe.session.user
+	frappe.set_user(schedule.owner)
+	try:
+		send_schedule_emails(schedule)
+	finally:
+		frappe.set_user(current_user)
+
+	schedule.db_set("last_sent_on", now_datetime())
+	frappe.db.commit()
+
+
+def send_schedule_emails(schedule):
+	"""
+	With a party type, every party gets the report filtered to itself; all party
+	emails are resolved up front in bulk.
+	"""
+	base_filters = frappe.parse_json(schedule.filters or "{}")
+	subject = schedule.subject or _("Report: {0}").format(schedule.report)
+
+	if not schedule.party_type:
+		attachment = render_report(schedule.report, base_filters, schedule.format)
+		frappe.sendmail(recipients=schedule.get_recipients(), subject=subject, message=schedule.message, attachments=[attachment])
+	else:
+		party_filters = frappe.parse_json(schedule.party_filters or "{}")
+		party_filters.setdefault("disabled", 0)
+		parties = frappe.get_all(schedule.party_type, filters=party_filters, pluck="name")
+		emails = get_party_emails([(schedule.party_type, party) for party in parties])
+		emails = emails.get(schedule.party_type, {})
+
+		for i, party in enumerate(parties, 1):
+			if not emails.get(party):
+				continue
+
+			# Each party's filter set is rendered once; the attachment is embedded
+			# in the Email Queue entry, so nothing is kept around afterwards
+			filters = dict(base_filters, **{schedule.party_filter: party})
+			frappe.sendmail(
+				recipients=[emails[party]],
+				subject=subject,
+				message=schedule.message,
+				attachments=[render_report(schedule.report, filters, schedule.format)],
+				reference_doctype=schedule.party_type,
+				reference_name=party,
+			)
+
+			if i % SEND_BATCH_SIZE == 0:
+				frappe.db.commit()
+
+
+def can_run_report(report_name, user):
+	"""Report.is_permitted for `user` rather than the session user, plus read access to its DocType."""
+	report = frappe.get_cached_doc("Report", report_name)
+	allowed = get_custom_allowed_roles("report", report.name) or [d.role for d in report.roles]
+	if allowed and not has_common(frappe.get_roles(user), allowed):
+		return False
+
+	return not report.ref_doctype or frappe.has_permission(report.ref_doctype, "read", user=user)
+
+
+def render_report(report_name, filters, file_format):
+	"""Run a report and return it as an email attachment dict."""
+	report = frappe.get_doc("Report", report_name)
+	columns, data = report.get_data(filters=filters, as_dict=True, ignore_prepared_report=True)
+
+	columns = [c for c in columns if isinstance(c, dict)]
+	rows = [[row.get(c.get("fieldname")) for c in columns] for row in data]
+	file_name = frappe.scrub(report_name)
+
+	if file_format == "Excel":
+		xlsx = make_xlsx([[c.get("label") for c in columns], *rows], report_name[:31])
+		return {"fname": f"{file_name}.xlsx", "fcontent": xlsx.getvalue()}
+
+	# Cell values are data, not markup
+	html = frappe.render_template(
+		REPORT_TABLE_TEMPLATE,
+		{
+			"title": escape_html(report_name),
+			"columns": [{"label": escape_html(cstr(c.get("label")))} for c in columns],
+			"rows": [[escape_html(cstr(value)) for value in row] for row in rows],
+		},
+	)
+	return {"fname": f"{file_name}.pdf", "fcontent": get_pdf(html, {"orientation": "Landscape"})}
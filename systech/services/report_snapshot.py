@@ -0,0 +1,219 @@
+import gzip
+import hashlib
+import inspect
+import json
+from functools import wraps
+
+import frappe
+from frappe import _
+from frappe.utils import cint, format_datetime, now_datetime
+
+SNAPSHOT_DOCTYPE = "Report Snapshot"
+PAGE_LENGTH = 500
+
+# Filters that only steer how a snapshot is displayed, not what it contains
+DISPLAY_FILTERS = ("prepared", "page")
+
+
+def snapshot_report(report_name):
+	"""
+	Add a "prepared" mode to a script report's `execute`.
+	With the `prepared` filter set, the report is computed by a long-queue job
+	into a compressed columnar snapshot and pages are served from that snapshot,
+	so large ranges do not hold a web worker for the whole run.
+	"""
+
+	def decorator(execute):
+		@wraps(execute)
+		def wrapper(filters=None):
+			filters = frappe._dict(filters or {})
+			if not cint(filters.get("prepared")):
+				return execute(filters)
+
+			return get_snapshot_page(report_name, filters)
+
+		return wrapper
+
+	return decorator
+
+
+def get_snapshot_page(report_name, filters):
+	content_filters = get_content_filters(filters)
+	filters_hash = get_filters_hash(content_filters)
+
+	snapshot = frappe.db.get_value(
+		SNAPSHOT_DOCTYPE,
+		{"report_name": report_name, "filters_hash": filters_hash, "status": "Completed"},
+		["name", "snapshot_file", "computed_at"],
+		order_by="computed_at desc",
+		as_dict=True,
+	)
+
+	if not snapshot:
+		enqueue_snapshot(report_name, content_filters)
+		return [], [], _("The report is being prepared in the background. Refresh in a few minutes."), None
+
+	content = read_snapshot(snapshot.snapshot_file)
+	row_count = content["row_count"]
+	page = max(cint(filters.get("page")), 1)
+	start = (page - 1) * PAGE_LENGTH
+	end = min(start + PAGE_LENGTH, row_count)
+
+	fields = list(content["data"])
+	data = [{field: content["data"][field][i] for field in fields} for i in range(start, end)]
+
+	message = _("Snapshot computed at {0}. Showing rows {1} to {2} of {3}.").format(
+		format_datetime(snapshot.computed_at), start + 1 if row_count else 0, end, row_count
+	)
+
+	return content["columns"], data, message, None, content.get("report_summary")
+
+
+def get_content_filters(filters):
+	return frappe._dict(
+		{k: v for k, v in sorted(filters.items()) if k not in DISPLAY_FILTERS and v not in (None, "", [])}
+	)
+
+
+def get_filters_hash(content_filters):
+	return hashlib.sha1(json.dumps(content_filters, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@frappe.whitelist()
+def prepare_report(report_name, filters=None):
+	"""Queue a fresh snapshot for the given report and filters."""
+	if report_name not in get_snapshot_reports():
+		frappe.throw(_("Report {0} does not support prepared snapshots").format(report_name))
+
+	if not frappe.get_doc("Report", report_name).is_permitted():
+		frappe.throw(_("You don't have access to Report: {0}").format(report_name), frappe.PermissionError)
+
+	content_filters = get_content_filters(frappe._dict(frappe.parse_json(filters or "{}")))
+	return enqueue_snapshot(report_name, content_filters)
+
+
+def get_snapshot_reports():
+	return (
+		"Project General Report",
+		"Project Detailed Report",
+		"Supplier General Report",
+		"Supplier Detailed Report",
+	)
+
+
+def enqueue_snapshot(report_name, content_filters):
+	filters_hash = get_filters_hash(content_filters)
+
+	queued = frappe.db.get_value(
+		SNAPSHOT_DOCTYPE, {"report_name": report_name, "filters_hash": filters_hash, "status": "Queued"}
+	)
+	if queued:
+		return queued
+
+	snapshot = frappe.get_doc(
+		{
+			"doctype": SNAPSHOT_DOCTYPE,
+			"report_name": report_name,
+			"filters_hash": filters_hash,
+			"filters": json.dumps(content_filters, sort_keys=True, default=str),
+			"status": "Queued",
+		}
+	).insert(ignore_permissions=True)
+
+	frappe.enqueue(
+		"systech.services.report_snapshot.build_snapshot",
+		queue="long",
+		timeout=3600,
+		snapshot_name=snapshot.name,
+		enqueue_after_commit=True,
+	)
+
+	return snapshot.name
+
+
+def build_snapshot(snapshot_name):
+	snapshot = frappe.get_doc(SNAPSHOT_DOCTYPE, snapshot_name)
+
+	try:
+		# Run the undecorated execute: no result cache, no prepared-mode short circuit
+		method = "systech.systech.report.{0}.{0}.execute".format(frappe.scrub(snapshot.report_name))
+		execute = inspect.unwrap(frappe.get_attr(method))
+
+		frappe.flags.report_snapshot_run = True
+		try:
+			result = execute(frappe._dict(json.loads(snapshot.filters)))
+		finally:
+			frappe.flags.report_snapshot_run = False
+
+		file_url, row_count = write_snapshot(snapshot, result)
+	except Exception:
+		frappe.db.rollback()
+		snapshot.db_set({"status": "Failed", "error": frappe.get_traceback()})
+		frappe.db.commit()
+		raise
+
+	snapshot.db_set(
+		{"status": "Completed", "snapshot_file": file_url, "row_count": row_count, "computed_at": now_datetime()}
+	)
+	remove_older_snapshots(snapshot)
+	frappe.db.commit()
+
+
+def write_snapshot(snapshot, result):
+	"""
+	Store the result column-wise (one value list per field) as gzip-compressed JSON.
+	Column lists compress far better than row dicts and a page is a slice of each list.
+	"""
+	columns, data = result[0], result[1]
+	report_summary = result[4] if len(result) > 4 else None
+
+	fields = [c.get("fieldname") for c in columns if isinstance(c, dict)]
+	for row in data:
+		for key in row:
+			if key not in fields:
+				fields.append(key)
+
+	content = {
+		"columns": columns,
+		"report_summary": report_summary,
+		"row_count": len(data),
+		"data": {field: [row.get(field) for row in data] for field in fields},
+	}
+
+	file_name = f"{frappe.scrub(snapshot.report_name)}_{snapshot.name}.json.gz"
+	with gzip.open(frappe.get_site_path("private", "files", file_name), "wt", encoding="utf-8") as f:
+		json.dump(content, f, default=str)
+
+	file_doc = frappe.get_doc(
+		{
+			"doctype": "File",
+			"file_name": file_name,
+			"file_url": f"/private/files/{file_name}",
+			"is_private": 1,
+			"attached_to_doctype": SNAPSHOT_DOCTYPE,
+			"attached_to_name": snapshot.name,
+		}
+	).insert(ignore_permissions=True)
+
+	return file_doc.file_url, len(data)
+
+
+def read_snapshot(file_url):
+	path = frappe.get_site_path(file_url.lstrip("/"))
+	with gzip.open(path, "rt", encoding="utf-8") as f:
+		return json.load(f)
+
+
+def remove_older_snapshots(snapshot):
+	older = frappe.get_all(
+		SNAPSHOT_DOCTYPE,
+		filters={
+			"report_name": snapshot.report_name,
+			"filters_hash": snapshot.filters_hash,
+			"status": ["!=", "Queued"],
+			"name": ["!=", snapshot.name],
+		},
+		pluck="name",
+	)
+	for name in older:
+		frappe.delete_doc(SNAPSHOT_DOCTYPE, name, ignore_permissions=True, force=True)
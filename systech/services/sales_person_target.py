@@ -0,0 +1,165 @@
+import calendar
+
+import frappe
+from frappe import _
+from frappe.utils import flt, now
+
+# Selections above this size are applied by a background job
+BACKGROUND_THRESHOLD = 100
+# Sales People written per statement batch (and per commit in the background job)
+BATCH_SIZE = 500
+
+
+def apply_bulk_targets(fiscal_year, item_group, target_type, amount, sales_people):
+	"""
+	Set the fiscal year / item group target of many Sales People.
+	Small selections are written right away; large ones are queued and report progress.
+	"""
+	sales_people = list(dict.fromkeys(sales_people))
+	target_amount = flt(amount) * 12 if target_type == "Monthly" else flt(amount)
+	distribution_id = ensure_monthly_equal_distribution(fiscal_year)
+
+	if len(sales_people) > BACKGROUND_THRESHOLD:
+		frappe.enqueue(
+			"systech.services.sales_person_target.write_targets",
+			queue="long",
+			timeout=3600,
+			sales_people=sales_people,
+			fiscal_year=fiscal_year,
+			item_group=item_group,
+			target_amount=target_amount,
+			distribution_id=distribution_id,
+			publish_progress=True,
+			enqueue_after_commit=True,
+		)
+		return {"status": "queued", "updated_count": len(sales_people)}
+
+	write_targets(sales_people, fiscal_year, item_group, target_amount, distribution_id)
+	return {"status": "success", "updated_count": len(sales_people)}
+
+
+def write_targets(sales_people, fiscal_year, item_group, target_amount, distribution_id, publish_progress=False):
+	"""
+	Upsert the (fiscal_year, item_group) Target Detail row of every Sales Person:
+	per batch, one read of the existing rows, one UPDATE for them and one bulk insert
+	for the rest, without loading or saving the Sales Person documents.
+	"""
+	for start in range(0, len(sales_people), BATCH_SIZE):
+		batch = sales_people[start : start + BATCH_SIZE]
+		write_target_batch(batch, fiscal_year, item_group, target_amount, distribution_id)
+
+		if publish_progress:
+			frappe.db.commit()
+			done = start + len(batch)
+			frappe.publish_progress(
+				done * 100 / len(sales_people),
+				title=_("Applying Targets"),
+				description=_("{0} of {1} Sales People").format(done, len(sales_people)),
+			)
+
+	frappe.clear_document_cache("Sales Person")
+
+
+def write_target_batch(sales_people, fiscal_year, item_group, target_amount, distribution_id):
+	timestamp = now()
+	user = frappe.session.user
+
+	rows = frappe.db.sql(
+		"""
+		SELECT
+			parent,
+			MAX(idx) as max_idx,
+			GROUP_CONCAT(CASE WHEN fiscal_year = %(fiscal_year)s AND item_group = %(item_group)s
+				THEN name END) as existing
+		FROM `tabTarget Detail`
+		WHERE parenttype = 'Sales Person' AND parentfield = 'targets' AND parent IN %(sales_people)s
+		GROUP BY parent
+	""",
+		{"fiscal_year": fiscal_year, "item_group": item_group, "sales_people": sales_people},
+		as_dict=True,
+	)
+	targets = {row.parent: row for row in rows}
+
+	existing = [name for row in rows if row.existing for name in row.existing.split(",")]
+	if existing:
+		frappe.db.sql(
+			"""
+			UPDATE `tabTarget Detail`
+			SET target_amount = %(target_amount)s, distribution_id = %(distribution_id)s,
+				modified = %(modified)s, modified_by = %(user)s
+			WHERE name IN %(names)s
+		""",
+			{
+				"target_amount": target_amount,
+				"distribution_id": distribution_id,
+				"modified": timestamp,
+				"user": user,
+				"names": existing,
+			},
+		)
+
+	fields = [
+		"name", "creation", "modified", "owner", "modified_by", "docstatus",
+		"parent", "parenttype", "parentfield", "idx",
+		"fiscal_year", "item_group", "target_qty", "target_amount", "distribution_id",
+	]  # fmt: skip
+	values = []
+	for sales_person in sales_people:
+		target = targets.get(sales_person)
+		if target and target.existing:
+			continue
+
+		values.append(
+			(
+				frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0,
+				sales_person, "Sales Person", "targets", (target.max_idx if target else 0) + 1,
+				fiscal_year, item_group, 0, target_amount, distribution_id,
+			)  # fmt: skip
+		)
+	frappe.db.bulk_insert("Target Detail", fields, values, chunk_size=BATCH_SIZE)
+
+	frappe.db.sql(
+		"""
+		UPDATE `tabSales Person` SET modified = %(modified)s, modified_by = %(user)s
+		WHERE name IN %(sales_people)s
+	""",
+		{"modified": timestamp, "user": user, "sales_people": sales_people},
+	)
+
+
+def ensure_monthly_equal_distribution(fiscal_year):
+	"""
+	Ensure a 'Monthly Equal' distribution exists for the given fiscal year.
+	Returns the distribution ID.
+	"""
+	dist_name = f"Monthly Equal - {fiscal_year}"
+
+	if not frappe.db.exists("Monthly Distribution", dist_name):
+		dist = frappe.new_doc("Monthly Distribution")
+		dist.distribution_id = dist_name
+		dist.fiscal_year = fiscal_year
+
+		for month, percentage in get_monthly_equal_percentages():
+			dist.append("percentages", {"month": month, "percentage_allocation": percentage})
+
+		dist.insert(ignore_permissions=True)
+
+	return dist_name
+
+
+def get_monthly_equal_percentages():
+	# 11 months at 8.33%, last month at 8.37% = 100.00%
+	return [(calendar.month_name[month_num], 8.37 if month_num == 12 else 8.33) for month_num in range(1, 13)]
+
+
+def get_distribution_percentages(fiscal_year):
+	"""Month-wise percentages the bulk target will be spread with, whether or not the distribution exists yet."""
+	percentages = frappe.get_all(
+		"Monthly Distribution Percentage",
+		filters={"parenttype": "Monthly Distribution", "parent": f"Monthly Equal - {fiscal_year}"},
+		fields=["month", "percentage_allocation"],
+		order_by="idx",
+		as_list=True,
+	)
+
+	return [tuple(d) for d in percentages] or get_monthly_equal_percentages()
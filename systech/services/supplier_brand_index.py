@@ -0,0 +1,131 @@
+import frappe
+from frappe.utils import now
+
+from systech.services.instrumentation import instrument_hook
+
+INDEX_DOCTYPE = "Supplier Brand Index"
+
+
+@instrument_hook
+def update_supplier_brand_index(doc, method=None):
+	"""
+	Keep the supplier <-> brand (Item Group) index in step with purchases.
+	Hooked to: Purchase Invoice on_submit and on_cancel
+	"""
+	item_codes = list({item.item_code for item in doc.items if item.item_code})
+	if not item_codes:
+		return
+
+	item_groups = frappe.get_all(
+		"Item", filters={"name": ["in", item_codes]}, pluck="item_group", distinct=True
+	)
+	item_groups = [d for d in item_groups if d]
+	if not item_groups:
+		return
+
+	if method == "on_cancel":
+		remove_purchase(doc.supplier, item_groups)
+	else:
+		add_purchase(doc.supplier, item_groups, doc.posting_date)
+
+
+def add_purchase(supplier, item_groups, posting_date):
+	timestamp = now()
+	user = frappe.session.user
+	values = []
+	params = []
+	for item_group in item_groups:
+		values.append("(%s, %s, %s, %s, %s, 0, %s, %s, %s, 1)")
+		params.extend(
+			[frappe.generate_hash(length=10), timestamp, timestamp, user, user, supplier, item_group, posting_date]
+		)
+
+	frappe.db.sql(
+		f"""
+		INSERT INTO `tab{INDEX_DOCTYPE}`
+			(name, creation, modified, owner, modified_by, docstatus,
+			supplier, item_group, last_purchase_date, purchase_count)
+		VALUES {", ".join(values)}
+		ON DUPLICATE KEY UPDATE
+			purchase_count = purchase_count + 1,
+			last_purchase_date = GREATEST(COALESCE(last_purchase_date, VALUES(last_purchase_date)), VALUES(last_purchase_date)),
+			modified = VALUES(modified)
+	""",
+		params,
+	)
+
+
+def remove_purchase(supplier, item_groups):
+	params = {"supplier": supplier, "item_groups": item_groups}
+
+	frappe.db.sql(
+		f"""
+		UPDATE `tab{INDEX_DOCTYPE}`
+		SET purchase_count = purchase_count - 1
+		WHERE supplier = %(supplier)s AND item_group IN %(item_groups)s
+	""",
+		params,
+	)
+	frappe.db.sql(
+		f"""
+		DELETE FROM `tab{INDEX_DOCTYPE}`
+		WHERE supplier = %(supplier)s AND item_group IN %(item_groups)s AND purchase_count <= 0
+	""",
+		params,
+	)
+
+	# The cancelled invoice may have been the latest one; cancellations are rare
+	# enough to re-derive the date for just these pairs.
+	frappe.db.sql(
+		f"""
+		UPDATE `tab{INDEX_DOCTYPE}` idx
+		SET idx.last_purchase_date = (
+			SELECT MAX(pi.posting_date)
+			FROM `tabPurchase Invoice` pi
+			JOIN `tabPurchase Invoice Item` pi_item ON pi_item.parent = pi.name
+			JOIN `tabItem` item ON pi_item.item_code = item.name
+			WHERE pi.docstatus = 1
+			AND pi.supplier = idx.supplier
+			AND item.item_group = idx.item_group
+		)
+		WHERE idx.supplier = %(supplier)s AND idx.item_group IN %(item_groups)s
+	""",
+		params,
+	)
+
+
+def rebuild_supplier_brand_index():
+	"""Recompute the index from submitted Purchase Invoices."""
+	rows = frappe.db.sql(
+		"""
+		SELECT
+			pi.supplier,
+			item.item_group,
+			MAX(pi.posting_date) as last_purchase_date,
+			COUNT(DISTINCT pi.name) as purchase_count
+		FROM `tabPurchase Invoice Item` pi_item
+		JOIN `tabPurchase Invoice` pi ON pi_item.parent = pi.name
+		JOIN `tabItem` item ON pi_item.item_code = item.name
+		WHERE pi.docstatus = 1
+		GROUP BY pi.supplier, item.item_group
+	""",
+		as_dict=True,
+	)
+
+	frappe.db.delete(INDEX_DOCTYPE)
+
+	timestamp = now()
+	user = frappe.session.user
+	fields = [
+		"name", "creation", "modified", "owner", "modified_by", "docstatus",
+		"supplier", "item_group", "last_purchase_date", "purchase_count",
+	]  # fmt: skip
+	values = [
+		(
+			frappe.generate_hash(length=10), timestamp, timestamp, user, user, 0,
+			row.supplier, row.item_group, row.last_purchase_date, row.purchase_count,
+		)  # fmt: skip
+		for row in rows
+		if row.item_group
+	]
+	frappe.db.bulk_insert(INDEX_DOCTYPE, fields, values, chunk_size=5000)
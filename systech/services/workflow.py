@@ -2,6 +2,9 @@ import frappe
 from frappe import _
 from frappe.utils import flt
 
+from systech.services.instrumentation import instrument_hook
+
+@instrument_hook
 def before_workflow_action(doc, transition):
     """
     Hook to validate actions before they occur.
@@ -202,6 +205,7 @@ def request_release(docname, source_docname=None):
     return "Notification Sent"
 
 @frappe.whitelist()
+@instrument_hook
 def check_dependencies_on_release(doc, method=None):
     """
     Triggered when a Sales Order is Unreserved/Cancelled/Released/Updated.
@@ -738,6 +742,7 @@ def release_stock_manually(docname, item_releases):
             
     return {"status": "success", "closed": total_remaining <= 0}
 
+@instrument_hook
 def enforce_dn_stock(doc, method=None):
     """
     Hook to strictly enforce stock availability on Delivery Note submission.
@@ -2,6 +2,63 @@
 // For license information, please see license.txt
 
 frappe.ui.form.on('Asset Revaluation', {
+    refresh: function (frm) {
+        if (frm.doc.docstatus === 0 && frm.doc.asset) {
+            frm.add_custom_button(__('Simulate Schedule'), function () {
+                frm.trigger('simulate_schedule');
+            });
+        }
+    },
+    simulate_schedule: function (frm) {
+        let additional_months = 0;
+        if (frm.doc.allow_life_override) {
+            additional_months = frm.doc.life_input_mode == "Months"
+                ? flt(frm.doc.new_remaining_life_months)
+                : flt(frm.doc.new_remaining_life) * 12;
+        }
+
+        frappe.call({
+            method: "systech.systech.doctype.asset_revaluation.asset_revaluation.simulate_revaluation",
+            args: {
+                revaluations: [{
+                    asset: frm.doc.asset,
+                    new_asset_value: frm.doc.new_asset_value || 0,
+                    new_remaining_life_months: additional_months,
+                    effective_from_date: frm.doc.effective_from_date || frm.doc.revaluation_date
+                }]
+            },
+            freeze: true,
+            callback: function (r) {
+                let result = (r.message || [])[0];
+                if (!result || result.error || !result.schedules.length) {
+                    frappe.msgprint((result && result.error) || __('No active depreciation schedule to simulate'));
+                    return;
+                }
+
+                let html = result.schedules.map(schedule => {
+                    let rows = schedule.rows.map(row => `<tr>
+                        <td>${frappe.datetime.str_to_user(row.schedule_date)}</td>
+                        <td class="text-right">${format_currency(row.depreciation_amount)}</td>
+                        <td class="text-right">${format_currency(row.accumulated_depreciation_amount)}</td>
+                        <td>${row.journal_entry || ''}</td>
+                    </tr>`).join('');
+
+                    return `<h5>${schedule.finance_book || __('Default')}</h5>
+                        <table class="table table-bordered table-condensed">
+                            <thead><tr>
+                                <th>${__('Schedule Date')}</th>
+                                <th class="text-right">${__('Depreciation Amount')}</th>
+                                <th class="text-right">${__('Accumulated Depreciation')}</th>
+                                <th>${__('Journal Entry')}</th>
+                            </tr></thead>
+                            <tbody>${rows}</tbody>
+                        </table>`;
+                }).join('');
+
+                frappe.msgprint({ title: __('Simulated Depreciation Schedule'), message: html, wide: true });
+            }
+        });
+    },
     asset: function (frm) {
         if (frm.doc.asset) {
             frappe.call({
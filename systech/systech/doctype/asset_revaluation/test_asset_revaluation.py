@@ -1,9 +1,31 @@
 # Copyright (c) 2025, Tati and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import getdate
+
+from systech.services.depreciation_schedule import splice_schedule
 
 
 class TestAssetRevaluation(FrappeTestCase):
-	pass
+	def test_splice_schedule_splits_straddling_row(self):
+		rows = [
+			frappe._dict(schedule_date=getdate(d), depreciation_amount=1000.0, journal_entry=None)
+			for d in ("2025-01-31", "2025-02-28", "2025-03-31")
+		]
+		fb_row = frappe._dict(
+			total_number_of_depreciations=3,
+			frequency_of_depreciation=1,
+			value_after_depreciation=3000.0,
+			expected_value_after_useful_life=0,
+		)
+
+		spliced = splice_schedule(rows, "2025-02-15", "2025-01-01", fb_row, 2)
+
+		self.assertEqual(
+			[getdate(row.schedule_date) for row in spliced],
+			[getdate(d) for d in ("2025-01-31", "2025-02-14", "2025-02-28", "2025-03-31")],
+		)
+		self.assertEqual(spliced[1].depreciation_amount, 500.0)
+		self.assertEqual(spliced[-1].accumulated_depreciation_amount, 3000.0)
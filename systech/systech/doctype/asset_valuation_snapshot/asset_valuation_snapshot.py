@@ -0,0 +1,14 @@
+# Copyright (c) 2026, Tati and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class AssetValuationSnapshot(Document):
+	pass
+
+
+def on_doctype_update():
+	# Period-end lookups read one snapshot date, narrowed by company
+	frappe.db.add_index("Asset Valuation Snapshot", ["snapshot_date", "company"])
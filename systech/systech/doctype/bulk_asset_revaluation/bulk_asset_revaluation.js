@@ -0,0 +1,37 @@
+// Copyright (c) 2026, Tati and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on('Bulk Asset Revaluation', {
+    setup: function (frm) {
+        frm.set_query('revaluation_account', function () {
+            return { filters: { company: frm.doc.company, is_group: 0 } };
+        });
+        frm.set_query('asset', 'items', function () {
+            return { filters: { company: frm.doc.company, docstatus: 1 } };
+        });
+    },
+    refresh: function (frm) {
+        if (frm.doc.docstatus === 0) {
+            frm.add_custom_button(__('Get Assets'), function () {
+                frm.call('get_assets').then(() => frm.dirty());
+            });
+        }
+
+        if (frm.doc.docstatus === 1 && frm.doc.schedule_status === 'Failed') {
+            frm.add_custom_button(__('Retry Schedule Update'), function () {
+                frappe.call({
+                    method: 'systech.systech.doctype.bulk_asset_revaluation.bulk_asset_revaluation.retry_bulk_revaluation',
+                    args: { bulk_revaluation: frm.doc.name },
+                    callback: function () {
+                        frm.reload_doc();
+                    }
+                });
+            });
+        }
+    },
+    revaluation_rule: function (frm) {
+        if (frm.doc.revaluation_rule !== 'Percentage') {
+            frm.set_value('percentage', 0);
+        }
+    }
+});
@@ -0,0 +1,292 @@
+# Copyright (c) 2026, Tati and contributors
+# For license information, please see license.txt
+
+from collections import Counter
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import flt
+from erpnext.assets.doctype.asset.depreciation import get_depreciation_accounts
+
+from systech.services.depreciation_schedule import get_finance_book_row, rebuild_asset_schedules
+
+# Assets revalued (values + schedules) per commit in the background job
+BATCH_SIZE = 50
+
+
+class BulkAssetRevaluation(Document):
+	def validate(self):
+		self.validate_assets()
+		self.set_revaluation_amounts()
+
+	def validate_assets(self):
+		assets = [d.asset for d in self.items]
+		duplicates = [asset for asset, count in Counter(assets).items() if count > 1]
+		if duplicates:
+			frappe.throw(_("Assets added more than once: {0}").format(", ".join(duplicates)))
+
+		invalid = [
+			d.name
+			for d in frappe.get_all(
+				"Asset", filters={"name": ["in", assets]}, fields=["name", "docstatus", "company"]
+			)
+			if d.docstatus != 1 or d.company != self.company
+		]
+		if invalid:
+			frappe.throw(
+				_("Assets must be submitted and belong to company {0}: {1}").format(
+					self.company, ", ".join(invalid)
+				)
+			)
+
+	def set_revaluation_amounts(self):
+		book_values = get_asset_book_values([d.asset for d in self.items])
+
+		missing = [d.asset for d in self.items if d.asset not in book_values]
+		if missing:
+			frappe.throw(_("Assets without a Finance Book: {0}").format(", ".join(missing)))
+
+		for row in self.items:
+			book = book_values[row.asset]
+			row.finance_book = book.finance_book
+			row.current_value = book.value_after_depreciation
+
+			if self.revaluation_rule == "Percentage":
+				row.new_value = flt(
+					flt(row.current_value) * (1 + flt(self.percentage) / 100), row.precision("new_value")
+				)
+
+			if flt(row.new_value) < 0:
+				frappe.throw(_("Row {0}: New Value cannot be negative").format(row.idx))
+
+			row.revaluation_difference = flt(row.new_value) - flt(row.current_value)
+
+		self.total_current_value = sum(flt(d.current_value) for d in self.items)
+		self.total_revaluation_difference = sum(flt(d.revaluation_difference) for d in self.items)
+
+	@frappe.whitelist()
+	def get_assets(self):
+		filters = {
+			"company": self.company,
+			"docstatus": 1,
+			"calculate_depreciation": 1,
+			"status": ["not in", ["Scrapped", "Sold", "Fully Depreciated"]],
+		}
+		if self.asset_category:
+			filters["asset_category"] = self.asset_category
+		if self.location:
+			filters["location"] = self.location
+
+		assets = frappe.get_all("Asset", filters=filters, fields=["name", "asset_name"], order_by="name")
+		book_values = get_asset_book_values([d.name for d in assets])
+
+		self.set("items", [])
+		for asset in assets:
+			if asset.name not in book_values:
+				continue
+			self.append(
+				"items",
+				{
+					"asset": asset.name,
+					"asset_name": asset.asset_name,
+					"new_value": book_values[asset.name].value_after_depreciation,
+				},
+			)
+
+		self.set_revaluation_amounts()
+
+	def on_submit(self):
+		self.make_journal_entry()
+		self.db_set("schedule_status", "Queued")
+		frappe.enqueue(
+			"systech.systech.doctype.bulk_asset_revaluation.bulk_asset_revaluation.process_bulk_revaluation",
+			queue="long",
+			timeout=6 * 3600,
+			bulk_revaluation=self.name,
+			enqueue_after_commit=True,
+		)
+
+	def before_cancel(self):
+		# The Journal Entry and the rewritten depreciation schedules cannot be rolled back from here
+		frappe.throw(
+			_("Bulk Asset Revaluation cannot be cancelled. Post a new revaluation to reverse it."),
+			title=_("Not Allowed"),
+		)
+
+	def make_journal_entry(self):
+		"""One Journal Entry for all assets: a line per asset, one net line per direction."""
+		rows = [d for d in self.items if flt(d.revaluation_difference)]
+		if not rows:
+			return
+
+		book_values = get_asset_book_values([d.asset for d in rows])
+		depreciation_cost_center, depreciation_series = frappe.get_cached_value(
+			"Company", self.company, ["depreciation_cost_center", "series_for_depreciation_entry"]
+		)
+
+		fixed_asset_accounts = {}
+		je = frappe.new_doc("Journal Entry")
+		je.voucher_type = "Depreciation Entry"
+		je.company = self.company
+		je.posting_date = self.revaluation_date
+		je.naming_series = depreciation_series
+		je.user_remark = _("Bulk Asset Revaluation {0}: {1}").format(self.name, self.reason_for_revaluation)
+
+		total_increase = total_decrease = 0
+		for row in rows:
+			book = book_values[row.asset]
+			if book.asset_category not in fixed_asset_accounts:
+				fixed_asset_accounts[book.asset_category] = get_depreciation_accounts(
+					book.asset_category, self.company
+				)[0]
+
+			amount = abs(flt(row.revaluation_difference))
+			side = "debit_in_account_currency" if row.revaluation_difference > 0 else "credit_in_account_currency"
+			je.append(
+				"accounts",
+				{
+					"account": fixed_asset_accounts[book.asset_category],
+					side: amount,
+					"cost_center": book.cost_center or depreciation_cost_center,
+					"reference_type": "Asset",
+					"reference_name": row.asset,
+				},
+			)
+
+			if row.revaluation_difference > 0:
+				total_increase += amount
+			else:
+				total_decrease += amount
+
+		if total_increase:
+			je.append(
+				"accounts",
+				{
+					"account": self.revaluation_account,
+					"credit_in_account_currency": total_increase,
+					"cost_center": depreciation_cost_center,
+				},
+			)
+		if total_decrease:
+			je.append(
+				"accounts",
+				{
+					"account": self.revaluation_account,
+					"debit_in_account_currency": total_decrease,
+					"cost_center": depreciation_cost_center,
+				},
+			)
+
+		je.flags.ignore_permissions = True
+		je.submit()
+		self.db_set("journal_entry", je.name)
+
+	def revalue_asset(self, row):
+		"""Apply one row to its Asset / Finance Book values and splice its schedules."""
+		asset = frappe.get_doc("Asset", row.asset)
+		fb_row = get_finance_book_row(asset, row.finance_book)
+
+		fb_row.value_after_depreciation = flt(fb_row.value_after_depreciation) + flt(row.revaluation_difference)
+		fb_values = {"value_after_depreciation": fb_row.value_after_depreciation}
+
+		if flt(self.additional_life_months):
+			frequency_months = fb_row.frequency_of_depreciation or 1
+			fb_row.total_number_of_depreciations = (
+				flt(fb_row.total_number_of_depreciations) + flt(self.additional_life_months) / frequency_months
+			)
+			fb_values["total_number_of_depreciations"] = fb_row.total_number_of_depreciations
+
+		frappe.db.set_value("Asset Finance Book", fb_row.name, fb_values, update_modified=False)
+		frappe.db.set_value(
+			"Asset",
+			asset.name,
+			"value_after_depreciation",
+			flt(asset.value_after_depreciation) + flt(row.revaluation_difference),
+		)
+
+		notes = _("Bulk Asset Revaluation {0}: Value {1}, Additional Life {2} months").format(
+			self.name, row.new_value, flt(self.additional_life_months)
+		)
+		rebuild_asset_schedules(asset, self.effective_from_date or self.revaluation_date, notes)
+		row.db_set("schedule_updated", 1, update_modified=False)
+
+
+def get_asset_book_values(assets):
+	"""
+	Finance book values of many assets in one query: the default finance book row,
+	else the first one. Returns {asset: row}.
+	"""
+	if not assets:
+		return {}
+
+	rows = frappe.db.sql(
+		"""
+		SELECT
+			asset.name as asset,
+			asset.asset_category,
+			asset.cost_center,
+			afb.finance_book,
+			afb.value_after_depreciation
+		FROM `tabAsset` asset
+		JOIN `tabAsset Finance Book` afb
+			ON afb.parent = asset.name AND afb.parenttype = 'Asset'
+		WHERE asset.name IN %(assets)s
+		ORDER BY (afb.finance_book <=> asset.default_finance_book) DESC, afb.idx
+	""",
+		{"assets": assets},
+		as_dict=True,
+	)
+
+	book_values = {}
+	for row in rows:
+		book_values.setdefault(row.asset, row)
+
+	return book_values
+
+
+def process_bulk_revaluation(bulk_revaluation):
+	"""
+	Background job: revalue the assets of a submitted Bulk Asset Revaluation,
+	committing every BATCH_SIZE assets. Rows already done are skipped, so a failed
+	run can simply be queued again.
+	"""
+	doc = frappe.get_doc("Bulk Asset Revaluation", bulk_revaluation)
+	doc.db_set("schedule_status", "In Progress", commit=True)
+
+	pending = [d for d in doc.items if not d.schedule_updated]
+	try:
+		for start in range(0, len(pending), BATCH_SIZE):
+			for row in pending[start : start + BATCH_SIZE]:
+				doc.revalue_asset(row)
+
+			frappe.db.commit()
+			frappe.publish_progress(
+				min(start + BATCH_SIZE, len(pending)) * 100 / len(pending),
+				title=_("Revaluing Assets"),
+				doctype=doc.doctype,
+				docname=doc.name,
+			)
+	except Exception:
+		frappe.db.rollback()
+		doc.db_set("schedule_status", "Failed", commit=True)
+		doc.log_error("Bulk Asset Revaluation failed")
+		raise
+
+	doc.db_set("schedule_status", "Completed", commit=True)
+
+
+@frappe.whitelist()
+def retry_bulk_revaluation(bulk_revaluation):
+	doc = frappe.get_doc("Bulk Asset Revaluation", bulk_revaluation)
+	doc.check_permission("submit")
+	if doc.docstatus != 1 or doc.schedule_status != "Failed":
+		frappe.throw(_("Only submitted revaluations whose schedule update failed can be retried"))
+
+	doc.db_set("schedule_status", "Queued")
+	frappe.enqueue(
+		"systech.systech.doctype.bulk_asset_revaluation.bulk_asset_revaluation.process_bulk_revaluation",
+		queue="long",
+		timeout=6 * 3600,
+		bulk_revaluation=doc.name,
+	)
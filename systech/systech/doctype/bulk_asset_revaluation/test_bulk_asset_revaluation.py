@@ -0,0 +1,22 @@
+# Copyright (c) 2026, Tati and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+
+class TestBulkAssetRevaluation(FrappeTestCase):
+	def test_cancel_is_blocked(self):
+		doc = frappe.new_doc("Bulk Asset Revaluation")
+		self.assertRaises(frappe.ValidationError, doc.before_cancel)
+
+	def test_no_cancel_or_amend_permission(self):
+		meta = frappe.get_meta("Bulk Asset Revaluation")
+		self.assertFalse(meta.has_field("amended_from"))
+		self.assertFalse([perm.role for perm in meta.permissions if perm.cancel or perm.amend])
+
+	def test_duplicate_assets_rejected(self):
+		doc = frappe.new_doc("Bulk Asset Revaluation")
+		doc.append("items", {"asset": "_Test Asset"})
+		doc.append("items", {"asset": "_Test Asset"})
+		self.assertRaises(frappe.ValidationError, doc.validate_assets)
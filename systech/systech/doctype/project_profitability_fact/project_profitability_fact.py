@@ -0,0 +1,18 @@
+# Copyright (c) 2026, Tati and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class ProjectProfitabilityFact(Document):
+	pass
+
+
+def on_doctype_update():
+	# Submit/cancel hooks upsert on this key with ON DUPLICATE KEY UPDATE
+	frappe.db.add_unique(
+		"Project Profitability Fact",
+		["project", "item_code", "period"],
+		constraint_name="unique_project_item_period",
+	)
@@ -0,0 +1,12 @@
+// Copyright (c) 2026, Tati and contributors
+// For license information, please see license.txt
+
+frappe.ui.form.on('Report Email Schedule', {
+    refresh: function (frm) {
+        if (!frm.is_new() && frm.doc.enabled) {
+            frm.add_custom_button(__('Send Now'), function () {
+                frm.call('send_now');
+            });
+        }
+    }
+});
@@ -0,0 +1,57 @@
+# Copyright (c) 2026, Tati and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe import _
+from frappe.model.document import Document
+from frappe.utils import getdate, nowdate, validate_email_address
+
+from systech.services.report_mailer import can_run_report
+
+
+class ReportEmailSchedule(Document):
+	def validate(self):
+		for fieldname in ("filters", "party_filters"):
+			if self.get(fieldname):
+				try:
+					frappe.parse_json(self.get(fieldname))
+				except ValueError:
+					frappe.throw(_("{0} must be valid JSON").format(self.meta.get_label(fieldname)))
+
+		if not can_run_report(self.report, self.owner or frappe.session.user):
+			frappe.throw(_("You are not permitted to run Report {0}").format(frappe.bold(self.report)))
+
+		if self.party_type and not self.party_filter:
+			frappe.throw(_("Party Filter Field is required when sending per {0}").format(_(self.party_type)))
+
+		if not self.party_type:
+			recipients = self.get_recipients()
+			if not recipients:
+				frappe.throw(_("Add at least one recipient, or choose a Party Type"))
+			for email in recipients:
+				validate_email_address(email, throw=True)
+
+	def get_recipients(self):
+		return [e.strip() for e in (self.recipients or "").replace("\n", ",").split(",") if e.strip()]
+
+	def is_due(self):
+		if not self.last_sent_on:
+			return True
+
+		last_sent = getdate(self.last_sent_on)
+		today = getdate(nowdate())
+		if self.frequency == "Daily":
+			return last_sent < today
+		if self.frequency == "Weekly":
+			return (today - last_sent).days >= 7
+		return (last_sent.year, last_sent.month) != (today.year, today.month)
+
+	@frappe.whitelist()
+	def send_now(self):
+		frappe.enqueue(
+			"systech.services.report_mailer.send_report_schedule",
+			queue="long",
+			timeout=3600,
+			schedule_name=self.name,
+		)
+		frappe.msgprint(_("Report emails queued"), alert=True)
@@ -0,0 +1,48 @@
+# Copyright (c) 2026, Tati and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from systech.services.report_mailer import can_run_report
+
+TEST_REPORT = "Project General Report"
+
+
+class TestReportEmailSchedule(FrappeTestCase):
+	def make_schedule(self, **kwargs):
+		return frappe.get_doc(
+			{"doctype": "Report Email Schedule", "report": TEST_REPORT, "frequency": "Daily", "format": "PDF", **kwargs}
+		)
+
+	def make_user_without_roles(self):
+		email = f"_test_report_mailer_{frappe.generate_hash(length=8)}@example.com"
+		frappe.get_doc({"doctype": "User", "email": email, "first_name": "Report Mailer"}).insert(
+			ignore_permissions=True
+		)
+		return email
+
+	def test_recipients_are_split_on_commas_and_newlines(self):
+		schedule = self.make_schedule(recipients="a@example.com,\n b@example.com ,")
+		self.assertEqual(schedule.get_recipients(), ["a@example.com", "b@example.com"])
+
+	def test_recipients_required_without_party_type(self):
+		self.assertRaises(frappe.ValidationError, self.make_schedule(recipients=" , ").insert)
+
+	def test_invalid_recipient_rejected(self):
+		self.assertRaises(frappe.ValidationError, self.make_schedule(recipients="not-an-email").insert)
+
+	def test_party_filter_required_with_party_type(self):
+		self.assertRaises(frappe.ValidationError, self.make_schedule(party_type="Supplier").insert)
+
+	def test_report_must_be_permitted_for_owner(self):
+		user = self.make_user_without_roles()
+		self.assertFalse(can_run_report(TEST_REPORT, user))
+		self.assertTrue(can_run_report(TEST_REPORT, "Administrator"))
+
+		frappe.set_user(user)
+		try:
+			schedule = self.make_schedule(recipients="a@example.com")
+			self.assertRaises(frappe.ValidationError, schedule.insert, ignore_permissions=True)
+		finally:
+			frappe.set_user("Administrator")
@@ -0,0 +1,18 @@
+# Copyright (c) 2026, Tati and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class SupplierBrandIndex(Document):
+	pass
+
+
+def on_doctype_update():
+	# (supplier, item_group) serves brand lookups and the submit upsert;
+	# (item_group, supplier) serves supplier lookups for a brand
+	frappe.db.add_unique(
+		"Supplier Brand Index", ["supplier", "item_group"], constraint_name="unique_supplier_item_group"
+	)
+	frappe.db.add_index("Supplier Brand Index", ["item_group", "supplier"])
@@ -0,0 +1,78 @@
+// Copyright (c) 2026, Tati and contributors
+// For license information, please see license.txt
+
+frappe.pages['hook-latency'].on_page_load = function (wrapper) {
+    const page = frappe.ui.make_app_page({
+        parent: wrapper,
+        title: __('Hook Latency'),
+        single_column: true
+    });
+
+    const hours = page.add_field({
+        fieldname: 'hours',
+        label: __('Last Hours'),
+        fieldtype: 'Select',
+        options: ['1', '6', '12', '24'],
+        default: '24',
+        change: () => load_stats()
+    });
+
+    page.set_primary_action(__('Refresh'), () => load_stats(), 'refresh');
+
+    const $body = $('<div class="hook-latency"></div>').appendTo(page.main);
+
+    function load_stats() {
+        frappe.call({
+            method: 'systech.services.instrumentation.get_hook_stats',
+            args: { hours: hours.get_value() },
+            freeze: true,
+            callback: function (r) {
+                render(r.message || { hooks: [] });
+            }
+        });
+    }
+
+    function render(stats) {
+        if (!stats.hooks.length) {
+            $body.html(`<p class="text-muted">${__('No hook calls recorded in this period.')}</p>`);
+            return;
+        }
+
+        // Percentiles are histogram bucket bounds, not exact timings
+        const ms = (value) => (value === null || value === undefined ? '&gt; 5000' : `&le; ${value}`);
+        const rows = stats.hooks.map((row) => `
+            <tr>
+                <td>${frappe.utils.escape_html(row.hook)}</td>
+                <td>${frappe.utils.escape_html(row.doctype || '')}</td>
+                <td class="text-right">${format_number(row.calls, null, 0)}</td>
+                <td class="text-right">${format_number(row.time_ms, null, 0)}</td>
+                <td class="text-right">${format_number(row.avg_ms, null, 2)}</td>
+                <td class="text-right">${ms(row.p50_ms)}</td>
+                <td class="text-right">${ms(row.p95_ms)}</td>
+                <td class="text-right">${format_number(row.avg_queries, null, 2)}</td>
+                <td class="text-right">${format_number(row.avg_rows, null, 2)}</td>
+            </tr>
+        `).join('');
+
+        $body.html(`
+            <table class="table table-bordered table-condensed">
+                <thead>
+                    <tr>
+                        <th>${__('Hook')}</th>
+                        <th>${__('Document Type')}</th>
+                        <th class="text-right">${__('Calls')}</th>
+                        <th class="text-right">${__('Total (ms)')}</th>
+                        <th class="text-right">${__('Avg (ms)')}</th>
+                        <th class="text-right">${__('p50 (ms)')}</th>
+                        <th class="text-right">${__('p95 (ms)')}</th>
+                        <th class="text-right">${__('Avg Queries')}</th>
+                        <th class="text-right">${__('Avg Rows')}</th>
+                    </tr>
+                </thead>
+                <tbody>${rows}</tbody>
+            </table>
+        `);
+    }
+
+    load_stats();
+};
@@ -45,9 +45,37 @@ frappe.query_reports["Project Detailed Report"] = {
                 }
                 frappe.query_report.refresh();
             }
+        },
+        {
+            "fieldname": "prepared",
+            "label": __("Prepared Snapshot"),
+            "fieldtype": "Check",
+            "default": 0
+        },
+        {
+            "fieldname": "page",
+            "label": __("Page"),
+            "fieldtype": "Int",
+            "default": 1,
+            "depends_on": "eval:doc.prepared"
         }
     ],
     "onload": function (report) {
+        report.page.add_inner_button(__('Rebuild Snapshot'), function () {
+            frappe.call({
+                method: 'systech.services.report_snapshot.prepare_report',
+                args: {
+                    report_name: 'Project Detailed Report',
+                    filters: report.get_values()
+                },
+                callback: function (r) {
+                    if (!r.exc) {
+                        frappe.show_alert({ message: __('Snapshot queued. Refresh with Prepared Snapshot checked once it completes.'), indicator: 'blue' });
+                    }
+                }
+            });
+        });
+
         report.page.add_inner_button(__('Send to Email'), function () {
             let d = new frappe.ui.Dialog({
                 title: __('Email Report'),
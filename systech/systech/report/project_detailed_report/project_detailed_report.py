@@ -2,6 +2,17 @@ import frappe
 from frappe import _
 from frappe.utils import flt
 
+from systech.services.project_profitability import (
+    LINE_PROJECT,
+    covers_whole_months,
+    get_fact_conditions,
+    get_invoice_conditions,
+)
+from systech.services.report_cache import cached_report
+from systech.services.report_snapshot import snapshot_report
+
+@snapshot_report("Project Detailed Report")
+@cached_report("Project Detailed Report")
 def execute(filters=None):
     if filters is None:
         filters = {}
@@ -28,120 +39,145 @@ def get_columns():
 def get_data(filters):
     customer = filters.get("customer")
     project = filters.get("project")
-    from_date = filters.get("from_date")
-    to_date = filters.get("to_date")
-    
+
     project_filters = {}
     if customer:
         project_filters["customer"] = customer
     if project:
         project_filters["name"] = project
-        
+
     projects = frappe.get_all("Project", filters=project_filters, fields=["name", "customer"])
-    project_names = [p.name for p in projects]
-    
-    if not project_names:
+    if not projects:
         return [], 0, 0
 
-    # Date condition for SQL
-    date_condition = ""
-    if from_date and to_date:
-        date_condition = "AND parent_si.posting_date BETWEEN %(from_date)s AND %(to_date)s"
-    
+    project_customers = {p.name: p.customer for p in projects}
+    conditions, params = get_invoice_conditions(filters, LINE_PROJECT)
+
+    if covers_whole_months(filters.get("from_date"), filters.get("to_date")):
+        # Whole-month ranges are answered from the monthly profitability facts
+        rows = get_fact_totals(filters)
+        vouchers_count = get_vouchers_count(conditions, params)
+    else:
+        rows, vouchers_count = get_invoice_totals(conditions, params)
+
+    # Track distinct items
+    total_items_set = set()
+
+    data = []
+    for row in rows:
+        row["customer"] = project_customers.get(row["project"])
+        row["profit"] = flt(row["sales_amount"]) - flt(row["cost_amount"])
+        total_items_set.add(row["item_code"])
+        data.append(row)
+
+    return data, len(total_items_set), vouchers_count
+
+def get_fact_totals(filters):
+    conditions, params = get_fact_conditions(filters)
+
+    return frappe.db.sql(f"""
+        SELECT
+            fact.project,
+            fact.item_code,
+            fact.item_name,
+            SUM(fact.sales_qty) as sales_qty,
+            SUM(fact.sales_amount) as sales_amount,
+            SUM(fact.cost_qty) as cost_qty,
+            SUM(fact.cost_amount) as cost_amount
+        FROM `tabProject Profitability Fact` fact
+        WHERE {conditions}
+        GROUP BY fact.project, fact.item_code
+    """, params, as_dict=True)
+
+def get_vouchers_count(conditions, params):
+    vouchers_count = 0
+    for doctype in ("Sales Invoice", "Purchase Invoice"):
+        vouchers_count += frappe.db.sql(f"""
+            SELECT COUNT(DISTINCT inv.name)
+            FROM `tab{doctype} Item` inv_item
+            JOIN `tab{doctype}` inv ON inv_item.parent = inv.name
+            WHERE {conditions}
+        """, params)[0][0]
+
+    return vouchers_count
+
+def get_invoice_totals(conditions, params):
     # Get Sales Invoices Items
-    sales_items = frappe.db.sql(f"""
-        SELECT 
-            parent_si.project,
-            parent_si.customer,
-            parent_si.name as si_name,
-            si_item.item_code,
-            si_item.item_name,
-            SUM(si_item.qty) as sales_qty,
-            SUM(si_item.base_amount) as sales_amount
-        FROM `tabSales Invoice Item` si_item
-        JOIN `tabSales Invoice` parent_si ON si_item.parent = parent_si.name
-        WHERE parent_si.project IN %(projects)s
-        AND parent_si.docstatus = 1
-        {date_condition}
-        GROUP BY parent_si.project, si_item.item_code
-    """, {"projects": project_names, "from_date": from_date, "to_date": to_date}, as_dict=True)
-
-    # Date condition for costs
-    cost_date_condition = ""
-    if from_date and to_date:
-        cost_date_condition = "AND parent_pi.posting_date BETWEEN %(from_date)s AND %(to_date)s"
+    sales_items = get_item_totals("Sales Invoice", conditions, params)
 
     # Get Purchase Invoice Items (Costs)
-    cost_items = frappe.db.sql(f"""
-        SELECT 
-            parent_pi.project,
-            parent_pi.name as pi_name,
-            pi_item.item_code,
-            pi_item.item_name,
-            SUM(pi_item.qty) as cost_qty,
-            SUM(pi_item.base_amount) as cost_amount
-        FROM `tabPurchase Invoice Item` pi_item
-        JOIN `tabPurchase Invoice` parent_pi ON pi_item.parent = parent_pi.name
-        WHERE parent_pi.project IN %(projects)s
-        AND parent_pi.docstatus = 1
-        {cost_date_condition}
-        GROUP BY parent_pi.project, pi_item.item_code
-    """, {"projects": project_names, "from_date": from_date, "to_date": to_date}, as_dict=True)
-
-    # Track distinct items and vouchers
-    total_items_set = set()
-    total_vouchers_set = set()
+    cost_items = get_item_totals("Purchase Invoice", conditions, params)
+
+    vouchers_count = 0
 
     # Merge Data
     merged_data = {}
-    
-    # Merge Data
-    merged_data = {}
-    
+
     for s in sales_items:
-        key = (s.project, s.item_code)
-        merged_data[key] = {
+        if s.project is None:
+            # WITH ROLLUP grand total row
+            vouchers_count += s.vouchers
+            continue
+        if s.item_code is None:
+            # WITH ROLLUP per-project subtotal
+            continue
+
+        merged_data[(s.project, s.item_code)] = {
             "project": s.project,
-            "customer": s.customer,
             "item_code": s.item_code,
             "item_name": s.item_name,
-            "sales_qty": s.sales_qty,
-            "sales_amount": s.sales_amount,
+            "sales_qty": s.qty,
+            "sales_amount": s.amount,
             "cost_qty": 0.0,
             "cost_amount": 0.0
         }
-        total_items_set.add(s.item_code)
-        
+
     for c in cost_items:
+        if c.project is None:
+            vouchers_count += c.vouchers
+            continue
+        if c.item_code is None:
+            continue
+
         key = (c.project, c.item_code)
-        total_items_set.add(c.item_code)
         if key in merged_data:
-            merged_data[key]["cost_qty"] = c.cost_qty
-            merged_data[key]["cost_amount"] = c.cost_amount
+            merged_data[key]["cost_qty"] = c.qty
+            merged_data[key]["cost_amount"] = c.amount
         else:
-            cust = frappe.db.get_value("Project", c.project, "customer")
             merged_data[key] = {
                 "project": c.project,
-                "customer": cust,
                 "item_code": c.item_code,
                 "item_name": c.item_name,
                 "sales_qty": 0.0,
                 "sales_amount": 0.0,
-                "cost_qty": c.cost_qty,
-                "cost_amount": c.cost_amount
+                "cost_qty": c.qty,
+                "cost_amount": c.amount
             }
 
-    # Re-querying vouchers for accurate count
-    vouchers = frappe.get_all("Sales Invoice", filters={"project": ["in", project_names], "docstatus": 1, "posting_date": ["between", [from_date, to_date]] if from_date else ["!=", ""]})
-    vouchers += frappe.get_all("Purchase Invoice", filters={"project": ["in", project_names], "docstatus": 1, "posting_date": ["between", [from_date, to_date]] if from_date else ["!=", ""]})
-    for v in vouchers: total_vouchers_set.add(v.name)
+    return list(merged_data.values()), vouchers_count
 
-    data = []
-    for val in merged_data.values():
-        val["profit"] = flt(val["sales_amount"]) - flt(val["cost_amount"])
-        data.append(val)
-        
-    return data, len(total_items_set), len(total_vouchers_set)
+def get_item_totals(doctype, conditions, params):
+    """
+    Qty and base amount per (project, item) for submitted invoices, each line
+    counted towards its own project (else the invoice's) as the facts are.
+    WITH ROLLUP adds a grand total row (project is NULL) whose
+    COUNT(DISTINCT) gives the voucher count without re-querying invoices.
+    Lines without an item code are grouped under '', so a NULL item code
+    only ever marks a per-project subtotal row.
+    """
+    return frappe.db.sql(f"""
+        SELECT
+            {LINE_PROJECT} as project,
+            IFNULL(inv_item.item_code, '') as item_code,
+            inv_item.item_name,
+            SUM(inv_item.qty) as qty,
+            SUM(inv_item.base_amount) as amount,
+            COUNT(DISTINCT inv.name) as vouchers
+        FROM `tab{doctype} Item` inv_item
+        JOIN `tab{doctype}` inv ON inv_item.parent = inv.name
+        WHERE {conditions}
+        GROUP BY {LINE_PROJECT}, IFNULL(inv_item.item_code, '') WITH ROLLUP
+    """, params, as_dict=True)
 
 def get_summary(data, items_count, vouchers_count):
     total_costs = sum(flt(d.get("cost_amount")) for d in data)
@@ -2,6 +2,17 @@ import frappe
 from frappe import _
 from frappe.utils import flt
 
+from systech.services.project_profitability import (
+    LINE_PROJECT,
+    covers_whole_months,
+    get_fact_conditions,
+    get_invoice_conditions,
+)
+from systech.services.report_cache import cached_report
+from systech.services.report_snapshot import snapshot_report
+
+@snapshot_report("Project General Report")
+@cached_report("Project General Report")
 def execute(filters=None):
     if filters is None:
         filters = {}
@@ -29,66 +40,98 @@ def get_columns():
 def get_data(filters):
     customer = filters.get("customer")
     project = filters.get("project")
-    from_date = filters.get("from_date")
-    to_date = filters.get("to_date")
-    
+
     # Base Projects query
     project_filters = {}
     if customer:
         project_filters["customer"] = customer
     if project:
         project_filters["name"] = project
-        
+
     projects = frappe.get_all("Project", filters=project_filters, fields=["name", "customer", "status", "estimated_costing"])
-    
+    if not projects:
+        return [], 0, 0
+
+    conditions, params = get_invoice_conditions(filters)
+
+    # One grouped statement per invoice type instead of per-project lookups
+    sales = get_invoice_totals("Sales Invoice", conditions, params)
+    costs = get_invoice_totals("Purchase Invoice", conditions, params)
+    if covers_whole_months(filters.get("from_date"), filters.get("to_date")):
+        items_count = get_fact_items_count(filters)
+    else:
+        # Lines count towards their own project, as in the facts
+        items_count = get_items_count(*get_invoice_conditions(filters, LINE_PROJECT))
+
     data = []
-    total_items_set = set()
-    total_vouchers_set = set()
-    
+    vouchers_count = 0
+
     for p in projects:
-        # Get Sales
-        sales_query_filters = {"project": p.name, "docstatus": 1}
-        if from_date and to_date:
-            sales_query_filters["posting_date"] = ["between", [from_date, to_date]]
-            
-        sales_invoices = frappe.get_all("Sales Invoice", filters=sales_query_filters, fields=["name", "grand_total"])
-        sales = sum(flt(si.grand_total) for si in sales_invoices)
-        
-        # Get Costs
-        costs_query_filters = {"project": p.name, "docstatus": 1}
-        if from_date and to_date:
-            costs_query_filters["posting_date"] = ["between", [from_date, to_date]]
-            
-        purchase_invoices = frappe.get_all("Purchase Invoice", filters=costs_query_filters, fields=["name", "grand_total"])
-        costs = sum(flt(pi.grand_total) for pi in purchase_invoices)
-        
-        # Track for summary
-        for si in sales_invoices: total_vouchers_set.add(si.name)
-        for pi in purchase_invoices: total_vouchers_set.add(pi.name)
-        
-        # Get unique items count for these vouchers
-        if sales_invoices or purchase_invoices:
-            invoice_names = [si.name for si in sales_invoices] + [pi.name for pi in purchase_invoices]
-            items = frappe.get_all("Sales Invoice Item", filters={"parent": ["in", invoice_names]}, fields=["item_code"])
-            items += frappe.get_all("Purchase Invoice Item", filters={"parent": ["in", invoice_names]}, fields=["item_code"])
-            for itm in items: total_items_set.add(itm.item_code)
+        project_sales = sales.get(p.name, {})
+        project_costs = costs.get(p.name, {})
+        vouchers_count += (project_sales.get("vouchers") or 0) + (project_costs.get("vouchers") or 0)
 
         budget = flt(p.estimated_costing)
-        real_profit = flt(sales) - flt(costs)
-        utilization = (flt(costs) / budget * 100) if budget > 0 else 0.0
-        
+        total_sales = flt(project_sales.get("total"))
+        total_costs = flt(project_costs.get("total"))
+        real_profit = total_sales - total_costs
+        utilization = (total_costs / budget * 100) if budget > 0 else 0.0
+
         data.append({
             "project": p.name,
             "customer": p.customer,
             "status": p.status,
             "budget": budget,
-            "sales": sales,
-            "costs": costs,
+            "sales": total_sales,
+            "costs": total_costs,
             "real_profit": real_profit,
             "utilization": utilization
         })
-        
-    return data, len(total_items_set), len(total_vouchers_set)
+
+    return data, items_count, vouchers_count
+
+def get_invoice_totals(doctype, conditions, params):
+    """Return {project: {"total": grand total, "vouchers": invoice count}} for submitted invoices."""
+    rows = frappe.db.sql(f"""
+        SELECT
+            inv.project,
+            SUM(inv.grand_total) as total,
+            COUNT(inv.name) as vouchers
+        FROM `tab{doctype}` inv
+        WHERE {conditions}
+        GROUP BY inv.project
+    """, params, as_dict=True)
+
+    return {row.project: row for row in rows}
+
+def get_items_count(conditions, params):
+    """Distinct items across all sales and purchase invoice lines of the selected projects."""
+    result = frappe.db.sql(f"""
+        SELECT COUNT(DISTINCT lines.item_code)
+        FROM (
+            SELECT inv_item.item_code
+            FROM `tabSales Invoice Item` inv_item
+            JOIN `tabSales Invoice` inv ON inv_item.parent = inv.name
+            WHERE {conditions}
+            UNION
+            SELECT inv_item.item_code
+            FROM `tabPurchase Invoice Item` inv_item
+            JOIN `tabPurchase Invoice` inv ON inv_item.parent = inv.name
+            WHERE {conditions}
+        ) lines
+    """, params)
+
+    return result[0][0] if result else 0
+
+def get_fact_items_count(filters):
+    """Distinct items from the monthly profitability facts, for whole-month ranges."""
+    conditions, params = get_fact_conditions(filters)
+
+    return frappe.db.sql(f"""
+        SELECT COUNT(DISTINCT fact.item_code)
+        FROM `tabProject Profitability Fact` fact
+        WHERE {conditions}
+    """, params)[0][0]
 
 def get_summary(data, items_count, vouchers_count):
     total_sales = sum(flt(d.get("sales")) for d in data)
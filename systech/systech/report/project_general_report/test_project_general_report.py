@@ -0,0 +1,46 @@
+# Copyright (c) 2026, Tati and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from systech.systech.report.project_general_report.project_general_report import get_data
+
+
+class TestProjectGeneralReport(FrappeTestCase):
+	def make_projects(self, count):
+		for i in range(count):
+			frappe.get_doc(
+				{
+					"doctype": "Project",
+					"project_name": f"_Test General Report Project {frappe.generate_hash(length=8)} {i}",
+					"estimated_costing": 1000,
+				}
+			).insert()
+
+	def count_report_queries(self):
+		queries = []
+		orig_sql = frappe.db.sql
+
+		def _sql_with_count(*args, **kwargs):
+			queries.append(args[0])
+			return orig_sql(*args, **kwargs)
+
+		frappe.db.sql = _sql_with_count
+		try:
+			get_data(frappe._dict())
+		finally:
+			del frappe.db.sql
+
+		return len(queries)
+
+	def test_query_count_independent_of_project_count(self):
+		self.make_projects(5)
+		# warm up meta caches before measuring; get_data bypasses the report result cache
+		get_data(frappe._dict())
+		small = self.count_report_queries()
+
+		self.make_projects(100)
+		large = self.count_report_queries()
+
+		self.assertEqual(small, large)
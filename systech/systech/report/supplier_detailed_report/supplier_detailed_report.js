@@ -51,9 +51,55 @@ frappe.query_reports["Supplier Detailed Report"] = {
                 }
                 frappe.query_report.refresh();
             }
+        },
+        {
+            "fieldname": "page",
+            "label": __("Page"),
+            "fieldtype": "Int",
+            "default": 1
+        },
+        {
+            "fieldname": "prepared",
+            "label": __("Prepared Snapshot"),
+            "fieldtype": "Check",
+            "default": 0
         }
     ],
     "onload": function (report) {
+        report.page.add_inner_button(__('Rebuild Snapshot'), function () {
+            frappe.call({
+                method: 'systech.services.report_snapshot.prepare_report',
+                args: {
+                    report_name: 'Supplier Detailed Report',
+                    filters: report.get_values()
+                },
+                callback: function (r) {
+                    if (!r.exc) {
+                        frappe.show_alert({ message: __('Snapshot queued. Refresh with Prepared Snapshot checked once it completes.'), indicator: 'blue' });
+                    }
+                }
+            });
+        });
+
+        report.page.add_inner_button(__('Export (Background)'), function () {
+            frappe.prompt([
+                { fieldtype: 'Select', fieldname: 'file_format', label: __('Format'), options: 'CSV\nExcel', default: 'CSV' }
+            ], function (values) {
+                frappe.call({
+                    method: 'systech.systech.report.supplier_detailed_report.supplier_detailed_report.enqueue_export',
+                    args: {
+                        filters: report.get_values(),
+                        file_format: values.file_format
+                    },
+                    callback: function (r) {
+                        if (!r.exc) {
+                            frappe.show_alert({ message: __('Export queued. You will be notified when the file is ready.'), indicator: 'blue' });
+                        }
+                    }
+                });
+            }, __('Export Supplier Detailed Report'), __('Export'));
+        });
+
         report.page.add_inner_button(__('Send to Email'), function () {
             let d = new frappe.ui.Dialog({
                 title: __('Email Report'),
@@ -1,16 +1,28 @@
+import csv
+import gzip
+
 import frappe
 from frappe import _
-from frappe.utils import flt
+from frappe.utils import cint, flt, now_datetime
+
+from systech.services.report_cache import cached_report
+from systech.services.report_snapshot import snapshot_report
+
+PAGE_LENGTH = 500
 
+@snapshot_report("Supplier Detailed Report")
+@cached_report("Supplier Detailed Report")
 def execute(filters=None):
     if filters is None:
         filters = {}
 
     columns = get_columns()
-    data, items_count, vouchers_count = get_data(filters)
-    report_summary = get_summary(data, items_count, vouchers_count)
-    
-    return columns, data, None, None, report_summary
+    totals = get_totals(filters)
+    data = get_data(filters)
+    report_summary = get_summary(totals)
+    message = get_page_message(filters, totals)
+
+    return columns, data, message, None, report_summary
 
 def get_columns():
     return [
@@ -24,24 +36,31 @@ def get_columns():
         {"label": _("Amount"), "fieldname": "amount", "fieldtype": "Currency", "width": 120}
     ]
 
-def get_data(filters):
-    supplier = filters.get("supplier")
-    brand = filters.get("brand")
-    from_date = filters.get("from_date")
-    to_date = filters.get("to_date")
-    
-    date_condition = ""
+def get_conditions(filters):
+    conditions = ["pi.docstatus = 1"]
     params = {}
-    if from_date and to_date:
-        date_condition = "AND pi.posting_date BETWEEN %(from_date)s AND %(to_date)s"
-        params["from_date"] = from_date
-        params["to_date"] = to_date
+
+    if filters.get("from_date") and filters.get("to_date"):
+        conditions.append("pi.posting_date BETWEEN %(from_date)s AND %(to_date)s")
+        params["from_date"] = filters.get("from_date")
+        params["to_date"] = filters.get("to_date")
+    if filters.get("supplier"):
+        conditions.append("pi.supplier = %(supplier)s")
+        params["supplier"] = filters.get("supplier")
+    if filters.get("brand"):
+        conditions.append("item.item_group = %(brand)s")
+        params["brand"] = filters.get("brand")
+
+    return " AND ".join(conditions), params
+
+def get_lines_query(filters):
+    """Purchase invoice lines in report column order, newest first."""
+    conditions, params = get_conditions(filters)
 
     sql = f"""
-        SELECT 
+        SELECT
             pi.supplier,
             pi.name as voucher_no,
-            'Purchase Invoice' as voucher_type,
             pi.posting_date,
             item.item_group,
             pi_item.item_code,
@@ -51,36 +70,122 @@ def get_data(filters):
         FROM `tabPurchase Invoice Item` pi_item
         JOIN `tabPurchase Invoice` pi ON pi_item.parent = pi.name
         JOIN `tabItem` item ON pi_item.item_code = item.name
-        WHERE pi.docstatus = 1
-        {date_condition}
+        WHERE {conditions}
+        ORDER BY pi.posting_date DESC, pi.name, pi_item.idx
     """
-    
-    if supplier:
-        sql += " AND pi.supplier = %(supplier)s"
-        params["supplier"] = supplier
-    if brand:
-        sql += " AND item.item_group = %(brand)s"
-        params["brand"] = brand
-        
-    sql += " ORDER BY pi.posting_date DESC, pi.name"
-    
-    data = frappe.db.sql(sql, params, as_dict=True)
 
-    # Track distinct items and vouchers
-    total_items_set = set()
-    total_vouchers_set = set()
-    
+    return sql, params
+
+def get_data(filters):
+    """
+    One page of lines; the page number comes from the `page` filter.
+    Prepared snapshot runs take every line and are paged from the snapshot instead.
+    """
+    sql, params = get_lines_query(filters)
+    if not frappe.flags.report_snapshot_run:
+        sql += " LIMIT %(start)s, %(page_length)s"
+        params["start"] = (max(cint(filters.get("page")), 1) - 1) * PAGE_LENGTH
+        params["page_length"] = PAGE_LENGTH
+
+    data = frappe.db.sql(sql, params, as_dict=True)
     for d in data:
-        total_items_set.add(d.item_code)
-        total_vouchers_set.add(d.voucher_no)
+        d.voucher_type = "Purchase Invoice"
+
+    return data
 
-    return data, len(total_items_set), len(total_vouchers_set)
+def get_totals(filters):
+    """Summary counts for the whole filtered result, computed without fetching the lines."""
+    conditions, params = get_conditions(filters)
 
-def get_summary(data, items_count, vouchers_count):
-    total_costs = sum(flt(d.get("amount")) for d in data)
-    
+    return frappe.db.sql(f"""
+        SELECT
+            COUNT(*) as lines_count,
+            COUNT(DISTINCT pi_item.item_code) as items_count,
+            COUNT(DISTINCT pi.name) as vouchers_count,
+            SUM(pi_item.base_amount) as total_costs
+        FROM `tabPurchase Invoice Item` pi_item
+        JOIN `tabPurchase Invoice` pi ON pi_item.parent = pi.name
+        JOIN `tabItem` item ON pi_item.item_code = item.name
+        WHERE {conditions}
+    """, params, as_dict=True)[0]
+
+def get_page_message(filters, totals):
+    if totals.lines_count <= PAGE_LENGTH:
+        return None
+
+    page = max(cint(filters.get("page")), 1)
+    return _("Showing lines {0} to {1} of {2}. Change the Page filter to browse, or use Export (Background) for the full set.").format(
+        (page - 1) * PAGE_LENGTH + 1,
+        min(page * PAGE_LENGTH, totals.lines_count),
+        totals.lines_count
+    )
+
+def get_summary(totals):
     return [
-        {"value": total_costs, "indicator": "red", "label": _("Total Costs"), "datatype": "Currency"},
-        {"value": items_count, "indicator": "blue", "label": _("Items"), "datatype": "Int"},
-        {"value": vouchers_count, "indicator": "orange", "label": _("Vouchers"), "datatype": "Int"}
+        {"value": flt(totals.total_costs), "indicator": "red", "label": _("Total Costs"), "datatype": "Currency"},
+        {"value": totals.items_count, "indicator": "blue", "label": _("Items"), "datatype": "Int"},
+        {"value": totals.vouchers_count, "indicator": "orange", "label": _("Vouchers"), "datatype": "Int"}
     ]
+
+@frappe.whitelist()
+def enqueue_export(filters, file_format="CSV"):
+    """Queue a full export of the report; the user is notified with a link when it is ready."""
+    if not frappe.get_doc("Report", "Supplier Detailed Report").is_permitted():
+        frappe.throw(_("You don't have access to Report: {0}").format("Supplier Detailed Report"), frappe.PermissionError)
+
+    if file_format not in ("CSV", "Excel"):
+        frappe.throw(_("Unsupported export format {0}").format(file_format))
+
+    frappe.enqueue(
+        "systech.systech.report.supplier_detailed_report.supplier_detailed_report.export_lines",
+        queue="long",
+        timeout=3600,
+        filters=frappe.parse_json(filters),
+        file_format=file_format
+    )
+
+def export_lines(filters, file_format="CSV"):
+    """
+    Stream every line to a private file without holding the result set in memory.
+    CSV is written gzip-compressed; Excel uses openpyxl's write-only mode.
+    """
+    columns = get_columns()
+    headers = [c["label"] for c in columns]
+    sql, params = get_lines_query(filters)
+
+    extension = "csv.gz" if file_format == "CSV" else "xlsx"
+    file_name = f"supplier_detailed_report_{now_datetime().strftime('%Y%m%d_%H%M%S')}.{extension}"
+    path = frappe.get_site_path("private", "files", file_name)
+
+    with frappe.db.unbuffered_cursor():
+        rows = frappe.db.sql(sql, params, as_iterator=True)
+
+        if file_format == "CSV":
+            with gzip.open(path, "wt", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                writer.writerow(headers)
+                for row in rows:
+                    writer.writerow(row)
+        else:
+            from openpyxl import Workbook
+
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet("Supplier Detailed Report")
+            sheet.append(headers)
+            for row in rows:
+                sheet.append(list(row))
+            workbook.save(path)
+
+    file_doc = frappe.get_doc({
+        "doctype": "File",
+        "file_name": file_name,
+        "file_url": f"/private/files/{file_name}",
+        "is_private": 1
+    }).insert(ignore_permissions=True)
+    frappe.db.commit()
+
+    frappe.publish_realtime(
+        "msgprint",
+        _("Supplier Detailed Report export is ready: <a href='{0}'>{1}</a>").format(file_doc.file_url, file_name),
+        user=frappe.session.user
+    )
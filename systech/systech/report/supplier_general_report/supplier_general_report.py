@@ -1,19 +1,29 @@
 import frappe
 from frappe import _
-from frappe.utils import flt
+from frappe.utils import flt, nowdate
 
+from systech.services.report_cache import cached_report
+from systech.services.report_snapshot import snapshot_report
+
+@snapshot_report("Supplier General Report")
+@cached_report("Supplier General Report")
 def execute(filters=None):
     if filters is None:
         filters = {}
 
-    columns = get_columns()
-    data, items_count, vouchers_count = get_data(filters)
-    report_summary = get_summary(data, items_count, vouchers_count)
+    columns = get_columns(filters)
+
+    if filters.get("view") == "Aging":
+        data, vouchers_count = get_aging_data(filters)
+        report_summary = get_aging_summary(data, vouchers_count)
+    else:
+        data, items_count, vouchers_count = get_data(filters)
+        report_summary = get_summary(data, items_count, vouchers_count)
     
     return columns, data, None, None, report_summary
 
-def get_columns():
-    return [
+def get_columns(filters=None):
+    columns = [
         {"label": _("Supplier"), "fieldname": "supplier", "fieldtype": "Link", "options": "Supplier", "width": 160},
         {"label": _("Brand (Item Group)"), "fieldname": "item_group", "fieldtype": "Link", "options": "Item Group", "width": 160},
         {"label": _("Total Costs"), "fieldname": "costs", "fieldtype": "Currency", "width": 130},
@@ -21,6 +31,16 @@ def get_columns():
         {"label": _("Outstanding Amount"), "fieldname": "outstanding", "fieldtype": "Currency", "width": 130}
     ]
 
+    if filters and filters.get("view") == "Aging":
+        columns += [
+            {"label": _("0-30"), "fieldname": "range1", "fieldtype": "Currency", "width": 110},
+            {"label": _("31-60"), "fieldname": "range2", "fieldtype": "Currency", "width": 110},
+            {"label": _("61-90"), "fieldname": "range3", "fieldtype": "Currency", "width": 110},
+            {"label": _("90 Above"), "fieldname": "range4", "fieldtype": "Currency", "width": 110}
+        ]
+
+    return columns
+
 def get_data(filters):
     supplier = filters.get("supplier")
     brand = filters.get("brand") # Item Group
@@ -38,12 +58,12 @@ def get_data(filters):
     sql = f"""
         SELECT 
             pi.supplier,
-            pi.name as pi_name,
             item.item_group,
-            si_item.item_code,
             SUM(si_item.base_amount) as costs,
             SUM(pi.base_paid_amount * (si_item.base_amount / NULLIF(pi.base_grand_total, 0))) as paid_amount,
-            SUM((pi.base_grand_total - pi.base_paid_amount) * (si_item.base_amount / NULLIF(pi.base_grand_total, 0))) as outstanding
+            SUM((pi.base_grand_total - pi.base_paid_amount) * (si_item.base_amount / NULLIF(pi.base_grand_total, 0))) as outstanding,
+            COUNT(DISTINCT si_item.item_code) as items_count,
+            COUNT(DISTINCT pi.name) as vouchers_count
         FROM `tabPurchase Invoice Item` si_item
         JOIN `tabPurchase Invoice` pi ON si_item.parent = pi.name
         JOIN `tabItem` item ON si_item.item_code = item.name
@@ -57,24 +77,113 @@ def get_data(filters):
     if brand:
         sql += " AND item.item_group = %(brand)s"
         params["brand"] = brand
-        
-    sql += " GROUP BY pi.supplier, item.item_group ORDER BY pi.supplier, item.item_group"
-    
-    data = frappe.db.sql(sql, params, as_dict=True)
 
-    # Track distinct items and vouchers
-    total_items_set = set()
-    total_vouchers_set = set()
-    
-    # We need to re-query for accurate counts if grouped
-    vouchers = frappe.get_all("Purchase Invoice", filters={"docstatus": 1, "posting_date": ["between", [from_date, to_date]] if from_date else ["!=", ""]})
-    if supplier: vouchers = [v for v in vouchers if v.supplier == supplier]
-    for v in vouchers: total_vouchers_set.add(v.name)
-    
-    items = frappe.get_all("Purchase Invoice Item", filters={"parent": ["in", list(total_vouchers_set)] if total_vouchers_set else ["!=", ""]}, fields=["item_code"])
-    for itm in items: total_items_set.add(itm.item_code)
+    # WITH ROLLUP returns rows already sorted by the group columns and adds a
+    # grand total row (supplier is NULL) carrying the distinct counts for the
+    # whole filtered result.
+    sql += " GROUP BY pi.supplier, item.item_group WITH ROLLUP"
+
+    data = []
+    items_count = vouchers_count = 0
+
+    for row in frappe.db.sql(sql, params, as_dict=True):
+        if row.supplier is None:
+            items_count, vouchers_count = row.items_count, row.vouchers_count
+        elif row.item_group is not None:
+            data.append(row)
+
+    return data, items_count, vouchers_count
+
+def get_aging_data(filters):
+    """
+    Supplier x brand aging from the Payment Ledger.
+    Paid and outstanding are read once per invoice from Payment Ledger Entry
+    and split across brands by each brand's share of the invoice total, so
+    the per-line proration of the summary view is not needed.
+    """
+    conditions = ["pi.docstatus = 1"]
+    brand_condition = ""
+    params = {"report_date": filters.get("to_date") or nowdate()}
+
+    if filters.get("from_date") and filters.get("to_date"):
+        conditions.append("pi.posting_date BETWEEN %(from_date)s AND %(to_date)s")
+        params["from_date"] = filters.get("from_date")
+        params["to_date"] = filters.get("to_date")
+    if filters.get("supplier"):
+        conditions.append("pi.supplier = %(supplier)s")
+        params["supplier"] = filters.get("supplier")
+    if filters.get("brand"):
+        brand_condition = "AND item.item_group = %(brand)s"
+        params["brand"] = filters.get("brand")
+
+    outstanding_share = "bal.outstanding * brands.amount / NULLIF(inv.base_total, 0)"
+    age = "DATEDIFF(%(report_date)s, inv.posting_date)"
+
+    rows = frappe.db.sql(f"""
+        WITH invoices AS (
+            SELECT pi.name, pi.supplier, pi.posting_date, pi.base_total
+            FROM `tabPurchase Invoice` pi
+            WHERE {" AND ".join(conditions)}
+        ),
+        balances AS (
+            SELECT
+                ple.against_voucher_no as invoice,
+                SUM(CASE WHEN ple.voucher_no = ple.against_voucher_no THEN ple.amount ELSE 0 END) as invoiced,
+                SUM(ple.amount) as outstanding
+            FROM `tabPayment Ledger Entry` ple
+            JOIN invoices inv ON inv.name = ple.against_voucher_no
+            WHERE ple.against_voucher_type = 'Purchase Invoice'
+            AND ple.delinked = 0
+            AND ple.posting_date <= %(report_date)s
+            GROUP BY ple.against_voucher_no
+        ),
+        brands AS (
+            SELECT pi_item.parent as invoice, item.item_group, SUM(pi_item.base_amount) as amount
+            FROM `tabPurchase Invoice Item` pi_item
+            JOIN invoices inv ON inv.name = pi_item.parent
+            JOIN `tabItem` item ON pi_item.item_code = item.name
+            WHERE 1 = 1 {brand_condition}
+            GROUP BY pi_item.parent, item.item_group
+        )
+        SELECT
+            inv.supplier,
+            brands.item_group,
+            SUM(brands.amount) as costs,
+            SUM((bal.invoiced - bal.outstanding) * brands.amount / NULLIF(inv.base_total, 0)) as paid_amount,
+            SUM({outstanding_share}) as outstanding,
+            SUM(CASE WHEN {age} <= 30 THEN {outstanding_share} ELSE 0 END) as range1,
+            SUM(CASE WHEN {age} BETWEEN 31 AND 60 THEN {outstanding_share} ELSE 0 END) as range2,
+            SUM(CASE WHEN {age} BETWEEN 61 AND 90 THEN {outstanding_share} ELSE 0 END) as range3,
+            SUM(CASE WHEN {age} > 90 THEN {outstanding_share} ELSE 0 END) as range4,
+            COUNT(DISTINCT inv.name) as vouchers_count
+        FROM invoices inv
+        JOIN brands ON brands.invoice = inv.name
+        LEFT JOIN balances bal ON bal.invoice = inv.name
+        GROUP BY inv.supplier, brands.item_group WITH ROLLUP
+    """, params, as_dict=True)
+
+    data = []
+    vouchers_count = 0
+
+    for row in rows:
+        if row.supplier is None:
+            vouchers_count = row.vouchers_count
+        elif row.item_group is not None:
+            data.append(row)
+
+    return data, vouchers_count
 
-    return data, len(total_items_set), len(total_vouchers_set)
+def get_aging_summary(data, vouchers_count):
+    total_costs = sum(flt(d.get("costs")) for d in data)
+    total_paid = sum(flt(d.get("paid_amount")) for d in data)
+    total_outstanding = sum(flt(d.get("outstanding")) for d in data)
+
+    return [
+        {"value": total_costs, "indicator": "red", "label": _("Total Costs"), "datatype": "Currency"},
+        {"value": vouchers_count, "indicator": "orange", "label": _("Vouchers"), "datatype": "Int"},
+        {"value": total_paid, "indicator": "green", "label": _("Total Paid"), "datatype": "Currency"},
+        {"value": total_outstanding, "indicator": "blue", "label": _("Total Outstanding"), "datatype": "Currency"}
+    ]
 
 def get_summary(data, items_count, vouchers_count):
     total_costs = sum(flt(d.get("costs")) for d in data)
@@ -4,6 +4,9 @@
 import frappe
 from frappe import _
 
+from systech.services.report_cache import cached_report
+
+@cached_report("Warehouse Stock Ledger")
 def execute(filters=None):
 	columns = get_columns()
 	data = get_data(filters)
@@ -0,0 +1,58 @@
+# Copyright (c) 2026, Tati and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from systech.services.field_masking import (
+	MASK_MODULE,
+	MASK_PERMLEVEL,
+	MASK_PROPERTY,
+	apply_field_masks,
+	get_masked_fields,
+	mask_rows,
+)
+
+TEST_ROLE = "_Test Masked Role"
+
+
+def get_mask_setters(doctype):
+	return {
+		d.field_name: d
+		for d in frappe.get_all(
+			"Property Setter",
+			filters={"doc_type": doctype, "property": MASK_PROPERTY},
+			fields=["field_name", "value", "module"],
+		)
+	}
+
+
+class TestFieldMasking(FrappeTestCase):
+	def test_masked_fields_collect_roles(self):
+		masked = get_masked_fields({"Role A": {"ToDo": ("description",)}, "Role B": {"ToDo": ("description", "priority")}})
+		self.assertEqual(masked, {("ToDo", "description"): ["Role A", "Role B"], ("ToDo", "priority"): ["Role B"]})
+
+	def test_mask_rows_drops_hidden_columns(self):
+		keep, rows = mask_rows(["a", "b", "c"], [[1, 2, 3], [4, 5, 6]], {"b"})
+		self.assertEqual(keep, [0, 2])
+		self.assertEqual(rows, [[1, 3], [4, 6]])
+
+	def test_setters_follow_registry(self):
+		apply_field_masks({TEST_ROLE: {"ToDo": ("description", "priority")}})
+		setters = get_mask_setters("ToDo")
+		self.assertEqual(setters["description"].value, str(MASK_PERMLEVEL))
+		self.assertEqual(setters["priority"].module, MASK_MODULE)
+
+		apply_field_masks({TEST_ROLE: {"ToDo": ("priority",)}})
+		setters = get_mask_setters("ToDo")
+		self.assertNotIn("description", setters)
+		self.assertIn("priority", setters)
+
+	def test_unowned_setters_are_kept(self):
+		frappe.make_property_setter(
+			{"doctype": "ToDo", "fieldname": "description", "property": MASK_PROPERTY, "value": "2"},
+			is_system_generated=False,
+		)
+
+		apply_field_masks({TEST_ROLE: {"ToDo": ("priority",)}})
+		self.assertEqual(get_mask_setters("ToDo")["description"].value, "2")
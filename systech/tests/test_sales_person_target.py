@@ -0,0 +1,69 @@
+# Copyright (c) 2026, Tati and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from systech.services.sales_person_target import ensure_monthly_equal_distribution, write_targets
+
+TEST_ITEM_GROUP = "All Item Groups"
+OTHER_ITEM_GROUP = "_Test Target Item Group"
+
+
+class TestSalesPersonTarget(FrappeTestCase):
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		cls.fiscal_year = frappe.get_all("Fiscal Year", pluck="name", order_by="year_start_date desc", limit=1)[0]
+		cls.distribution_id = ensure_monthly_equal_distribution(cls.fiscal_year)
+		if not frappe.db.exists("Item Group", OTHER_ITEM_GROUP):
+			frappe.get_doc(
+				{"doctype": "Item Group", "item_group_name": OTHER_ITEM_GROUP, "parent_item_group": TEST_ITEM_GROUP}
+			).insert()
+
+	def make_sales_person(self, targets=None):
+		return frappe.get_doc(
+			{
+				"doctype": "Sales Person",
+				"sales_person_name": f"_Test Target Person {frappe.generate_hash(length=8)}",
+				"parent_sales_person": frappe.db.get_value("Sales Person", {"is_group": 1}),
+				"targets": targets or [],
+			}
+		).insert()
+
+	def get_targets(self, sales_person):
+		return frappe.get_all(
+			"Target Detail",
+			filters={"parenttype": "Sales Person", "parent": sales_person},
+			fields=["fiscal_year", "item_group", "target_amount", "distribution_id", "idx"],
+			order_by="idx",
+		)
+
+	def write(self, sales_people, target_amount):
+		write_targets(sales_people, self.fiscal_year, TEST_ITEM_GROUP, target_amount, self.distribution_id)
+
+	def test_targets_inserted_then_updated(self):
+		sales_person = self.make_sales_person().name
+
+		self.write([sales_person], 1200)
+		targets = self.get_targets(sales_person)
+		self.assertEqual(len(targets), 1)
+		self.assertEqual(targets[0].target_amount, 1200)
+		self.assertEqual(targets[0].distribution_id, self.distribution_id)
+
+		self.write([sales_person], 2400)
+		targets = self.get_targets(sales_person)
+		self.assertEqual(len(targets), 1)
+		self.assertEqual(targets[0].target_amount, 2400)
+
+	def test_other_targets_are_kept(self):
+		other_group = {"fiscal_year": self.fiscal_year, "item_group": OTHER_ITEM_GROUP, "target_amount": 50}
+		sales_person = self.make_sales_person([other_group]).name
+		new_person = self.make_sales_person().name
+
+		self.write([sales_person, new_person], 600)
+
+		targets = self.get_targets(sales_person)
+		self.assertEqual([(d.item_group, d.idx) for d in targets], [(OTHER_ITEM_GROUP, 1), (TEST_ITEM_GROUP, 2)])
+		self.assertEqual(targets[0].target_amount, 50)
+		self.assertEqual(len(self.get_targets(new_person)), 1)